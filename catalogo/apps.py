@@ -5,3 +5,8 @@ class CatalogoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "catalogo"
     verbose_name = "Catálogo Público"
+
+    def ready(self):
+        from catalogo.signals import connect_signals
+
+        connect_signals()
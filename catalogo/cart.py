@@ -0,0 +1,161 @@
+"""
+Carrinho compacto guardado na sessão.
+
+Formato (versão 2)::
+
+    {
+        "v": 2,
+        "t": <tenant_id>,
+        "items": {<item_key>: [produto_id, [variacao_ids], quantidade, "preco", versao, "anterior"?]},
+        "total": "<decimal>",
+        "n": <quantidade total>,
+    }
+
+Na sessão ficam só ids, quantidades e o preço lido na inclusão, junto com a
+versão do catálogo em que ele foi lido. Linhas gravadas numa versão anterior
+são reprecificadas na leitura (``catalogo.services.refresh_cart_prices``);
+quando o preço muda, o antigo fica na sexta posição até o cliente vê-lo no
+checkout (``confirm_prices``).
+Nome, imagem e rótulos das variações vêm da fotografia do catálogo
+(``catalogo.snapshot``). O total e a contagem de itens são atualizados a cada
+operação, então incluir ou alterar uma linha não percorre o carrinho inteiro.
+
+Carrinhos no formato antigo (um dict por linha com nome, imagem e rótulos) são
+convertidos na primeira leitura.
+"""
+
+from decimal import Decimal
+
+CART_FORMAT = 2
+SESSION_KEY = "cart"
+
+# Posições dentro de cada linha.
+PRODUTO, VARIACOES, QUANTIDADE, PRECO, VERSAO, ANTERIOR = range(6)
+
+
+def new_cart(tenant_id=None):
+    return {"v": CART_FORMAT, "t": tenant_id, "items": {}, "total": "0", "n": 0}
+
+
+def _legacy_variacao_ids(payload):
+    ids = payload.get("variacoes_ids") or []
+    if not ids and payload.get("variacao_id"):
+        ids = [payload["variacao_id"]]
+    return sorted(str(raw_id) for raw_id in ids)
+
+
+def upgrade_cart(raw, tenant_id=None):
+    """Converte o carrinho antigo (dict por linha) para o formato compacto."""
+    cart = new_cart(tenant_id)
+    for item_key, payload in raw.items():
+        if not isinstance(payload, dict):
+            continue
+        try:
+            produto_id = int(payload.get("produto_id") or str(item_key).split(":")[0])
+        except (TypeError, ValueError):
+            continue
+        add_line(
+            cart,
+            str(item_key),
+            produto_id,
+            _legacy_variacao_ids(payload),
+            int(payload.get("quantidade") or 0),
+            payload.get("preco") or "0",
+            0,
+        )
+    return cart
+
+
+def load_cart(session, tenant_id=None):
+    raw = session.get(SESSION_KEY)
+    if not raw:
+        return new_cart(tenant_id)
+    if raw.get("v") != CART_FORMAT:
+        return upgrade_cart(raw, tenant_id)
+    return raw
+
+
+def cart_has_items(raw):
+    if not raw:
+        return False
+    if raw.get("v") == CART_FORMAT:
+        return bool(raw.get("items"))
+    return True
+
+
+def save_cart(session, cart):
+    session[SESSION_KEY] = cart
+    session.modified = True
+
+
+def add_line(cart, item_key, produto_id, variacao_ids, quantidade, preco, versao):
+    """
+    Soma ``quantidade`` à linha, criando-a se preciso. Uma linha existente
+    mantém o preço da primeira inclusão.
+    """
+    line = cart["items"].get(item_key)
+    if line is None:
+        line = cart["items"][item_key] = [produto_id, list(variacao_ids), 0, str(preco), versao]
+    line[QUANTIDADE] += quantidade
+    _adjust_totals(cart, line, quantidade)
+    return line
+
+
+def set_line_price(cart, item_key, preco, versao):
+    """
+    Troca o preço da linha (ajustando o total) e marca a versão em que ele foi
+    lido. Se o preço mudou, o anterior fica pendente na linha até
+    ``confirm_prices``; várias mudanças seguidas guardam o primeiro preço, e a
+    pendência some se o preço voltar a ele.
+    """
+    line = cart["items"][item_key]
+    preco = str(preco)
+    anterior = pending_price(line)
+    if anterior is None and Decimal(preco) != Decimal(line[PRECO]):
+        anterior = line[PRECO]
+    elif anterior is not None and Decimal(preco) == Decimal(anterior):
+        anterior = None
+    _adjust_totals(cart, line, -line[QUANTIDADE])
+    line[PRECO] = preco
+    line[VERSAO] = versao
+    del line[ANTERIOR:]
+    if anterior is not None:
+        line.append(anterior)
+    _adjust_totals(cart, line, line[QUANTIDADE])
+
+
+def pending_price(line):
+    """Preço antigo da linha que o cliente ainda não viu, ou ``None``."""
+    return line[ANTERIOR] if len(line) > ANTERIOR else None
+
+
+def confirm_prices(cart):
+    """Descarta os preços antigos pendentes. Devolve se algo mudou."""
+    modificado = False
+    for line in cart["items"].values():
+        if len(line) > ANTERIOR:
+            del line[ANTERIOR:]
+            modificado = True
+    return modificado
+
+
+def change_quantity(cart, item_key, delta):
+    line = cart["items"].get(item_key)
+    if line is None:
+        return
+    delta = max(delta, -line[QUANTIDADE])
+    line[QUANTIDADE] += delta
+    _adjust_totals(cart, line, delta)
+    if line[QUANTIDADE] == 0:
+        del cart["items"][item_key]
+
+
+def remove_line(cart, item_key):
+    line = cart["items"].get(item_key)
+    if line is not None:
+        change_quantity(cart, item_key, -line[QUANTIDADE])
+
+
+def _adjust_totals(cart, line, delta):
+    cart["n"] += delta
+    cart["total"] = str(Decimal(cart["total"]) + Decimal(line[PRECO]) * delta)
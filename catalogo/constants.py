@@ -0,0 +1,8 @@
+"""
+Constantes das imagens do catálogo, num módulo sem dependências para que os
+models possam usá-las sem importar ``catalogo.images`` (Pillow, requests).
+"""
+
+IMAGE_MAX_DIMENSION = 900
+# Larguras servidas pelo proxy; a maior é a derivada "mestre", baixada da origem.
+IMAGE_WIDTHS = (200, 400, IMAGE_MAX_DIMENSION)
@@ -1,11 +1,15 @@
-from catalogo.services import normalize_cart
+from django.utils.functional import SimpleLazyObject
+
+from catalogo.services import get_cart_summary
 
 
 def cart_summary(request):
-    cart = request.session.get("cart", {})
-    summary = normalize_cart(cart)
+    """
+    Os valores só são calculados quando o template realmente lê o carrinho;
+    páginas do painel e de login não tocam na sessão por causa dele.
+    """
     return {
-        "cart_total_items": summary["total_items"],
-        "cart_total_value": summary["total"],
-        "cart_items": summary["items"],
+        "cart_total_items": SimpleLazyObject(lambda: get_cart_summary(request)["total_items"]),
+        "cart_total_value": SimpleLazyObject(lambda: get_cart_summary(request)["total"]),
+        "cart_items": SimpleLazyObject(lambda: get_cart_summary(request)["items"]),
     }
@@ -0,0 +1,412 @@
+"""
+Armazenamento em disco das imagens redimensionadas servidas pelo catálogo.
+
+Cada derivada fica em um arquivo próprio dentro de ``IMAGE_CACHE_DIR``, com o
+nome derivado do hash da URL de origem. Como o diretório é compartilhado, todos
+os workers do gunicorn reaproveitam o mesmo download/redimensionamento e o
+conteúdo sobrevive a reinícios. O tamanho total é limitado por
+``IMAGE_CACHE_MAX_BYTES``: quando o limite é ultrapassado, os arquivos menos
+acessados (pelo ``atime``, atualizado explicitamente nas leituras) são
+removidos primeiro. O diretório só é varrido quando a conta local de bytes
+gravados passa do limite ou a cada ``EVICT_SCAN_INTERVAL`` segundos, nunca a
+cada gravação.
+
+Além da derivada mestre (900px, JPEG) são geradas, sob demanda, variantes em
+larguras menores e em WebP/AVIF, cada uma com sua própria chave
+(url, largura, formato).
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, UnidentifiedImageError, features
+from requests.exceptions import RequestException
+
+from catalogo.constants import IMAGE_MAX_DIMENSION, IMAGE_WIDTHS
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows em desenvolvimento
+    fcntl = None
+
+LOGGER = logging.getLogger(__name__)
+
+IMAGE_CACHE_TIMEOUT = 60 * 60 * 24  # one day
+IMAGE_QUALITY = 78
+IMAGE_FETCH_TIMEOUT = 8
+IMAGE_LOCK_TIMEOUT = IMAGE_FETCH_TIMEOUT * 3
+# Por quanto tempo uma origem que falhou não é buscada de novo.
+IMAGE_FAILURE_TIMEOUT = 60
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Varredura periódica para contar o que outros processos gravaram.
+EVICT_SCAN_INTERVAL = 10 * 60
+# O despejo desce até essa fração do limite, para não varrer de novo logo em seguida.
+EVICT_LOW_WATER = 0.9
+# Leituras só regravam o atime quando o anterior é mais antigo que isso.
+ATIME_RESOLUTION = 60 * 60
+
+DEFAULT_FORMAT = "jpeg"
+# formato -> (formato do PIL, content type, opções de gravação)
+IMAGE_FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 55}),
+    "webp": ("WEBP", "image/webp", {"quality": 75, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": IMAGE_QUALITY, "optimize": True}),
+}
+# Ordem de preferência na negociação pelo cabeçalho Accept.
+NEGOTIATED_FORMATS = [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    path: Path
+    size: int
+    mtime: float
+
+
+class DerivativeStore:
+    """
+    Diretório de derivadas com despejo LRU pelo total de bytes.
+
+    As escritas usam arquivo temporário + ``os.replace`` para que um worker nunca
+    leia uma imagem pela metade enquanto outro ainda está gravando.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Total medido na última varredura + bytes gravados por este processo desde então.
+        self._scanned_bytes = None
+        self._scanned_at = 0.0
+        self._written_bytes = 0
+
+    def path_for(self, key):
+        return self.root / key[:2] / f"{key}.img"
+
+    def get(self, key):
+        path = self.path_for(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if now - stat.st_atime > ATIME_RESOLUTION:
+            try:
+                # O atime marca o último acesso (LRU); o mtime identifica o conteúdo.
+                os.utime(path, (now, stat.st_mtime))
+            except OSError:
+                pass
+        return StoredImage(path=path, size=stat.st_size, mtime=stat.st_mtime)
+
+    def put(self, key, data):
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_name, path)
+        except OSError:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        self._record_write(len(data))
+        return self.get(key)
+
+    def _record_write(self, size):
+        with self._lock:
+            self._written_bytes += size
+            due = (
+                self._scanned_bytes is None
+                or self._scanned_bytes + self._written_bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at > EVICT_SCAN_INTERVAL
+            )
+        if due:
+            self.evict()
+
+    def _entries(self):
+        if not self.root.exists():
+            return []
+        entries = []
+        for path in self.root.glob("*/*.img"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+        return entries
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Varre o diretório e, acima do limite, remove os arquivos menos acessados
+        até ``EVICT_LOW_WATER`` do limite. Chamado por ``put`` quando a conta
+        local indica estouro (ou a varredura periódica venceu) e pelo
+        ``warm_images``.
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            if total > self.max_bytes:
+                target = self.max_bytes * EVICT_LOW_WATER
+                for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                    if total <= target:
+                        break
+                    try:
+                        path.unlink()
+                    except OSError:
+                        continue
+                    total -= size
+                    removed += 1
+            self._scanned_bytes = total
+            self._scanned_at = time.monotonic()
+            self._written_bytes = 0
+        if removed:
+            LOGGER.info("Image store evicted %s files (total %s bytes)", removed, total)
+        return removed
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    root = getattr(settings, "IMAGE_CACHE_DIR", None) or Path(settings.BASE_DIR) / "var" / "imagens"
+    max_bytes = getattr(settings, "IMAGE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+    if _store is None or _store.root != Path(root) or _store.max_bytes != max_bytes:
+        _store = DerivativeStore(root, max_bytes)
+    return _store
+
+
+def image_key(url, width=IMAGE_MAX_DIMENSION, fmt=DEFAULT_FORMAT):
+    return hashlib.sha256(f"{url}|{width}|{fmt}".encode("utf-8")).hexdigest()
+
+
+def normalize_width(width):
+    """Aproxima a largura pedida para a menor variante que a cobre."""
+    if not width:
+        return IMAGE_MAX_DIMENSION
+    for candidate in IMAGE_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return IMAGE_MAX_DIMENSION
+
+
+def negotiate_format(accept_header):
+    accept = (accept_header or "").lower()
+    for fmt in NEGOTIATED_FORMATS:
+        if IMAGE_FORMATS[fmt][1] in accept:
+            return fmt
+    return DEFAULT_FORMAT
+
+
+def content_type_for(fmt):
+    return IMAGE_FORMATS[fmt][1]
+
+
+def _encode(image, width, fmt):
+    pil_format, _, options = IMAGE_FORMATS[fmt]
+    if image.width > width or image.height > width:
+        image.thumbnail((width, width), Image.LANCZOS)
+    output = BytesIO()
+    image.save(output, format=pil_format, **options)
+    return output.getvalue()
+
+
+def _render_master(url):
+    response = requests.get(url, timeout=IMAGE_FETCH_TIMEOUT)
+    response.raise_for_status()
+    image = Image.open(BytesIO(response.content))
+    image = image.convert("RGB")
+    return _encode(image, IMAGE_MAX_DIMENSION, DEFAULT_FORMAT)
+
+
+def _render_variant(master, width, fmt):
+    with Image.open(master.path) as image:
+        image = image.convert("RGB")
+        return _encode(image, width, fmt)
+
+
+class _Flight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics = {"hits": 0, "fetched": 0, "rendered": 0, "coalesced": 0, "failed": 0, "skipped": 0}
+
+
+def _count(name):
+    with _metrics_lock:
+        _metrics[name] += 1
+
+
+def get_fetch_metrics():
+    """
+    Contadores do processo atual: ``hits`` (já estava em disco), ``fetched``
+    (download + redimensionamento feitos aqui), ``rendered`` (variante gerada a
+    partir da derivada mestre), ``coalesced`` (esperou outra thread/processo
+    gerar a mesma imagem), ``failed`` e ``skipped`` (origem falhou há pouco e
+    não foi buscada de novo).
+    """
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+def reset_fetch_metrics():
+    with _metrics_lock:
+        for name in _metrics:
+            _metrics[name] = 0
+
+
+# Quantidade de arquivos de trava: as chaves são distribuídas pelos primeiros
+# dígitos do hash, e os arquivos nunca são apagados.
+LOCK_SHARD_DIGITS = 3
+
+
+class _ProcessLock:
+    """
+    Trava exclusiva entre processos (``flock``), para que só um worker busque a
+    mesma URL. Os arquivos de trava formam um conjunto fixo (um por prefixo da
+    chave) e nunca são removidos: apagar o arquivo enquanto outro processo
+    espera por ele deixaria os dois com travas em inodes diferentes. Sem
+    ``fcntl`` a coordenação fica restrita às threads.
+    """
+
+    def __init__(self, store, key):
+        self.path = store.root / ".locks" / f"{key[:LOCK_SHARD_DIGITS]}.lock"
+        self.handle = None
+
+    def acquire(self, timeout=IMAGE_LOCK_TIMEOUT):
+        if fcntl is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = open(self.path, "a+b")
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(self.handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    # Segue sem a trava: pior caso é um download duplicado.
+                    return
+                time.sleep(0.05)
+
+    def release(self):
+        if self.handle is None:
+            return
+        try:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+        finally:
+            self.handle.close()
+            self.handle = None
+
+
+def _produce(store, key, render, metric):
+    lock = _ProcessLock(store, key)
+    lock.acquire()
+    try:
+        # Outro processo pode ter gravado a derivada enquanto esperávamos a trava.
+        stored = store.get(key)
+        if stored:
+            _count("coalesced")
+            return stored
+        try:
+            data = render()
+        except (RequestException, UnidentifiedImageError, OSError):
+            _count("failed")
+            cache.set(_failure_key(key), True, IMAGE_FAILURE_TIMEOUT)
+            return None
+        _count(metric)
+        try:
+            return store.put(key, data)
+        except OSError:
+            LOGGER.exception("Não foi possível gravar a derivada %s no cache em disco", key)
+            return None
+    finally:
+        lock.release()
+
+
+def _failure_key(key):
+    return f"catalogo:imagem-falhou:{key}"
+
+
+def _single_flight(store, key, render, metric):
+    stored = store.get(key)
+    if stored:
+        _count("hits")
+        return stored
+    if cache.get(_failure_key(key)):
+        _count("skipped")
+        return None
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if flight.done.wait(IMAGE_LOCK_TIMEOUT):
+            # Inclusive ``None``: a origem acabou de falhar para a líder.
+            if flight.result:
+                _count("coalesced")
+            return flight.result
+        # A thread líder demorou demais: tenta gerar por conta própria (ainda
+        # sob a trava entre processos).
+        return _produce(store, key, render, metric)
+
+    try:
+        flight.result = _produce(store, key, render, metric)
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+    return flight.result
+
+
+def get_derivative(url, width=None, fmt=DEFAULT_FORMAT):
+    """
+    Devolve a derivada (``StoredImage``) da URL na largura/formato pedidos,
+    gerando-a na primeira vez. A variante mestre (maior largura, JPEG) é baixada
+    da origem; as demais são geradas a partir dela, sem novo download. Chamadas
+    simultâneas para a mesma variante são agrupadas: apenas uma faz o trabalho e
+    as demais aguardam o resultado. Retorna ``None`` quando a origem está
+    indisponível; a falha é lembrada por ``IMAGE_FAILURE_TIMEOUT`` segundos.
+    """
+    if not url:
+        return None
+    width = normalize_width(width)
+    if fmt not in NEGOTIATED_FORMATS:
+        fmt = DEFAULT_FORMAT
+    store = get_store()
+    if width == IMAGE_MAX_DIMENSION and fmt == DEFAULT_FORMAT:
+        key = image_key(url)
+        return _single_flight(store, key, lambda: _render_master(url), "fetched")
+
+    master = get_derivative(url)
+    if not master:
+        return None
+    key = image_key(url, width, fmt)
+    return _single_flight(store, key, lambda: _render_variant(master, width, fmt), "rendered")
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalogo.images import get_store
+from catalogo.warmup import warm_image
+from produtos.models import Produto, ProdutoImagem
+from tenants.models import TenantProfile
+
+
+class Command(BaseCommand):
+    help = "Gera em paralelo todas as variantes das imagens do catálogo de um tenant."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tenant",
+            help="Slug ou id do tenant. Sem ele, todos os tenants ativos são aquecidos.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Quantidade de downloads/redimensionamentos simultâneos.",
+        )
+
+    def _resolve_tenants(self, identifier):
+        tenants = TenantProfile.objects.filter(is_active=True)
+        if not identifier:
+            return tenants
+        if identifier.isdigit():
+            tenants = tenants.filter(pk=int(identifier))
+        else:
+            tenants = tenants.filter(slug=identifier)
+        if not tenants.exists():
+            raise CommandError(f"Tenant '{identifier}' não encontrado.")
+        return tenants
+
+    def handle(self, *args, **options):
+        tenants = self._resolve_tenants(options["tenant"])
+        produtos = Produto.objects.filter(tenant__in=tenants, ativo=True)
+        urls = list(produtos.exclude(imagem__isnull=True).exclude(imagem="").values_list("imagem", flat=True))
+        urls += list(
+            ProdutoImagem.objects.filter(produto__in=produtos).values_list("url", flat=True)
+        )
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            self.stdout.write("Nenhuma imagem para aquecer.")
+            return
+
+        workers = max(1, options["workers"])
+        self.stdout.write(f"Aquecendo {len(urls)} imagens com {workers} workers...")
+        failed = 0
+        variants = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for ready in executor.map(warm_image, urls):
+                variants += ready
+                if not ready:
+                    failed += 1
+        removed = get_store().evict()
+        if removed:
+            self.stdout.write(f"{removed} derivadas antigas removidas do cache em disco.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(urls) - failed} imagens prontas ({variants} variantes); {failed} falharam."
+            )
+        )
@@ -0,0 +1,104 @@
+"""
+Motor de preços do carrinho.
+
+Resolve ``(produto, variações escolhidas)`` em preço, rótulos e chave da linha
+usando a fotografia do catálogo (``catalogo.snapshot``) e o índice de
+variações de cada produto, sem consultas quando a fotografia está aquecida. A
+mesma regra vale para a inclusão no carrinho, para a inclusão em lote e para a
+revalidação do carrinho no checkout.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+# Limite usado para variações sem categoria.
+DEFAULT_MAX_ESCOLHAS = 99
+
+
+class PricingError(Exception):
+    """Seleção inválida; a mensagem pode ser exibida ao cliente."""
+
+
+@dataclass(frozen=True, slots=True)
+class LinhaPrecificada:
+    produto: object  # ProdutoItem
+    variacao_ids: tuple  # ids (str) em ordem
+    preco: Decimal
+    labels: tuple
+
+    @property
+    def item_key(self):
+        if not self.variacao_ids:
+            return str(self.produto.pk)
+        return f"{self.produto.pk}:{'-'.join(self.variacao_ids)}"
+
+
+def variacao_label(variacao):
+    parts = [variacao.nome]
+    if variacao.tamanho:
+        parts.append(variacao.tamanho)
+    return " / ".join(parts)
+
+
+def price_line(produto, variacao_ids, strict=False):
+    """
+    Preço de ``produto`` (um ``ProdutoItem``) com as variações ``variacao_ids``.
+
+    Ids repetidos contam uma vez. Ids que não pertencem ao produto são
+    ignorados, ou geram ``PricingError`` com ``strict=True`` (revalidação de
+    linhas já gravadas). Também gera ``PricingError`` quando um grupo passa de
+    ``max_escolhas``.
+    """
+    escolhidas = {}
+    for raw_id in variacao_ids:
+        try:
+            pk = int(raw_id)
+        except (TypeError, ValueError):
+            pk = None
+        entry = produto.variacoes_index.get(pk)
+        if entry is None:
+            if strict and raw_id:
+                raise PricingError("Variação indisponível.")
+            continue
+        escolhidas[pk] = entry
+
+    contagem = {}
+    for grupo, _ in escolhidas.values():
+        limite = DEFAULT_MAX_ESCOLHAS if grupo.max_escolhas is None else grupo.max_escolhas
+        contagem[grupo.pk] = contagem.get(grupo.pk, 0) + 1
+        if contagem[grupo.pk] > limite:
+            raise PricingError(
+                f"Selecione no máximo {limite} opção(ões) em {grupo.nome or 'variações'}."
+            )
+
+    ordenadas = sorted(escolhidas.values(), key=lambda entry: str(entry[1].pk))
+    return LinhaPrecificada(
+        produto=produto,
+        variacao_ids=tuple(str(variacao.pk) for _, variacao in ordenadas),
+        preco=produto.preco + sum((variacao.preco_adicional for _, variacao in ordenadas), Decimal("0")),
+        labels=tuple(variacao_label(variacao) for _, variacao in ordenadas),
+    )
+
+
+def price_lines(snapshot, linhas, strict=False):
+    """
+    Precifica várias linhas ``(produto_id, variacao_ids)`` com a fotografia
+    ``snapshot`` do tenant, lida uma vez pelo chamador, que usa a mesma
+    ``snapshot.version`` ao gravar as linhas. Devolve uma lista na mesma ordem
+    com uma ``LinhaPrecificada`` ou o ``PricingError`` de cada linha.
+    """
+    produtos = snapshot.produtos if snapshot else {}
+    resultados = []
+    for produto_id, variacao_ids in linhas:
+        try:
+            produto = produtos.get(int(produto_id))
+        except (TypeError, ValueError):
+            produto = None
+        if produto is None:
+            resultados.append(PricingError("Produto indisponível."))
+            continue
+        try:
+            resultados.append(price_line(produto, variacao_ids, strict=strict))
+        except PricingError as exc:
+            resultados.append(exc)
+    return resultados
@@ -11,3 +11,19 @@ def get_default_catalog_profile():
         "desktop_image": banner_image,
         "mobile_image": banner_image,
     }
+
+
+def merge_catalog_profile(perfil):
+    """Aplica sobre os valores padrão os campos preenchidos de ``perfil`` (dict)."""
+    profile_data = get_default_catalog_profile()
+    for field in ("title", "message", "cta"):
+        if perfil.get(field):
+            profile_data[field] = perfil[field]
+    desktop_source = perfil.get("desktop_image") or perfil.get("image")
+    if desktop_source:
+        profile_data["desktop_image"] = desktop_source
+        profile_data["image"] = desktop_source
+    mobile_source = perfil.get("mobile_image") or desktop_source
+    if mobile_source:
+        profile_data["mobile_image"] = mobile_source
+    return profile_data
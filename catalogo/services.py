@@ -1,46 +1,131 @@
 from decimal import Decimal
 
+from catalogo.cart import (
+    CART_FORMAT,
+    PRECO,
+    PRODUTO,
+    QUANTIDADE,
+    VARIACOES,
+    VERSAO,
+    load_cart,
+    pending_price,
+    save_cart,
+    set_line_price,
+    upgrade_cart,
+)
+from catalogo.pricing import LinhaPrecificada, PricingError, price_line, price_lines, variacao_label
+from catalogo.snapshot import get_catalog_snapshot
+from produtos.models import Produto
 
-def normalize_cart(session_cart):
-    total = Decimal("0")
+
+def refresh_cart_prices(cart):
+    """
+    Reprecifica as linhas gravadas numa versão anterior do catálogo.
+
+    Linhas da versão atual não são tocadas. Nas demais, o preço é recalculado
+    com ``catalogo.pricing``; se mudou, a linha recebe o preço novo e guarda o
+    antigo até o cliente vê-lo no checkout (``catalogo.cart.set_line_price``).
+    Linhas indisponíveis ficam como estão para o checkout removê-las. Devolve
+    se o carrinho precisa ser gravado de novo.
+    """
+    if cart.get("v") != CART_FORMAT or not cart["t"] or not cart["items"]:
+        return False
+    snapshot = get_catalog_snapshot(cart["t"])
+    modificado = False
+    for item_key, line in list(cart["items"].items()):
+        if line[VERSAO] == snapshot.version:
+            continue
+        produto = snapshot.produtos.get(line[PRODUTO])
+        if produto is None:
+            continue
+        try:
+            linha = price_line(produto, line[VARIACOES], strict=True)
+        except PricingError:
+            continue
+        set_line_price(cart, item_key, linha.preco, snapshot.version)
+        modificado = True
+    return modificado
+
+
+def normalize_cart(cart):
+    """
+    Expande o carrinho compacto (``catalogo.cart``) nos itens exibidos pelos
+    templates, buscando nome, imagem e rótulos na fotografia do catálogo. O
+    total vem pronto do carrinho, sem ser recalculado. Linhas com preço antigo
+    pendente o trazem em ``preco_anterior``.
+    """
+    if cart.get("v") != CART_FORMAT:
+        cart = upgrade_cart(cart)
+    tenant_id = cart["t"]
+    if tenant_id is None and cart["items"]:
+        # Carrinho convertido do formato antigo, que não guardava o tenant.
+        first_line = next(iter(cart["items"].values()))
+        tenant_id = (
+            Produto.objects.filter(pk=first_line[PRODUTO]).values_list("tenant_id", flat=True).first()
+        )
+    produtos = get_catalog_snapshot(tenant_id).produtos if tenant_id and cart["items"] else {}
     items = []
-    total_items = 0
-
-    for item_key, payload in session_cart.items():
-        quantidade = payload.get("quantidade", 0)
-        preco = Decimal(str(payload.get("preco", "0")))
-        total += preco * quantidade
-        total_items += quantidade
-        base_nome = payload.get("nome")
-        variacao_label = payload.get("variacao_label") or payload.get("variacao")
-        variacoes_labels = payload.get("variacoes_labels") or []
-        nome_exibicao = base_nome
-        label_composta = variacao_label
-        if not label_composta and variacoes_labels:
-            label_composta = ", ".join([str(v) for v in variacoes_labels if v])
-        if base_nome and label_composta:
-            nome_exibicao = f"{base_nome} - {label_composta}"
+    for item_key, line in cart["items"].items():
+        produto = produtos.get(line[PRODUTO])
+        variacoes_ids = line[VARIACOES]
+        labels = []
+        if produto:
+            for raw_id in variacoes_ids:
+                variacao = produto.get_variacao(int(raw_id))
+                if variacao:
+                    labels.append(variacao_label(variacao))
+        base_nome = produto.nome if produto else f"Produto {line[PRODUTO]}"
+        label_composta = ", ".join(labels)
         items.append(
             {
-                "produto_id": payload.get("produto_id") or item_key,
+                "produto_id": line[PRODUTO],
                 "item_key": item_key,
-                "nome": nome_exibicao,
-                "quantidade": quantidade,
-                "preco": preco,
-                "imagem": payload.get("imagem"),
+                "nome": f"{base_nome} - {label_composta}" if label_composta else base_nome,
+                "quantidade": line[QUANTIDADE],
+                "preco": Decimal(line[PRECO]),
+                "imagem": produto.thumb_url if produto else "",
                 "variacao_label": label_composta,
-                "variacao_id": payload.get("variacao_id"),
-                "variacoes_labels": variacoes_labels,
+                "variacao_id": variacoes_ids[0] if variacoes_ids else None,
+                "variacoes_ids": variacoes_ids,
+                "variacoes_labels": labels,
+                "preco_anterior": _preco_anterior(line),
             }
         )
 
     return {
         "items": items,
-        "total": total,
-        "total_items": total_items,
+        "total": Decimal(cart["total"]),
+        "total_items": cart["n"],
+        "precos_alterados": any(item["preco_anterior"] is not None for item in items),
     }
 
 
+def _preco_anterior(line):
+    anterior = pending_price(line)
+    return Decimal(anterior) if anterior is not None else None
+
+
+def get_cart_summary(request):
+    """
+    Resumo normalizado do carrinho da sessão, calculado uma única vez por
+    requisição. Linhas de uma versão anterior do catálogo são reprecificadas e
+    o carrinho é regravado. Quem altera o carrinho deve chamar
+    ``invalidate_cart_summary``.
+    """
+    summary = getattr(request, "_cart_summary", None)
+    if summary is None:
+        cart = load_cart(request.session)
+        if refresh_cart_prices(cart):
+            save_cart(request.session, cart)
+        summary = normalize_cart(cart)
+        request._cart_summary = summary
+    return summary
+
+
+def invalidate_cart_summary(request):
+    request.__dict__.pop("_cart_summary", None)
+
+
 def serialize_cart(summary):
     return {
         "items": [
@@ -53,9 +138,73 @@ def serialize_cart(summary):
                 "imagem": item["imagem"],
                 "variacao_label": item.get("variacao_label"),
                 "variacao_id": item.get("variacao_id"),
+                "preco_anterior": (
+                    str(item["preco_anterior"]) if item.get("preco_anterior") is not None else None
+                ),
             }
             for item in summary["items"]
         ],
         "total_items": summary["total_items"],
         "total": str(summary["total"]),
+        "precos_alterados": summary.get("precos_alterados", False),
+    }
+
+
+def serialize_variacoes(produto):
+    """Árvore de variações de um ``ProdutoItem`` da fotografia, para o modal."""
+    return {
+        "produto": produto.pk,
+        "grupos": [
+            {
+                "nome": grupo.nome,
+                "max_escolhas": grupo.max_escolhas,
+                "variacoes": [
+                    {
+                        "id": variacao.pk,
+                        "nome": variacao.nome,
+                        "tamanho": variacao.tamanho,
+                        "preco_adicional": str(variacao.preco_adicional),
+                    }
+                    for variacao in grupo.variacoes
+                ],
+            }
+            for grupo in produto.variacao_grupos
+        ],
     }
+
+
+def _item_variacao_ids(item):
+    ids = item.get("variacoes_ids") or []
+    if not ids and item.get("variacao_id"):
+        ids = [item["variacao_id"]]
+    return [str(raw_id) for raw_id in ids]
+
+
+def reprice_cart_items(items, tenant):
+    """
+    Revalida os itens normalizados do carrinho com ``catalogo.pricing``.
+
+    Os preços guardados na sessão são ignorados: cada item é recalculado com o
+    preço atual do produto mais os adicionais das variações escolhidas, tudo a
+    partir de uma única leitura da fotografia do catálogo. Itens cujo produto
+    ou variação sumiu, ou que passam do limite de escolhas, são indisponíveis.
+    Devolve ``(itens_validos, total, itens_indisponiveis)``.
+    """
+    linhas = price_lines(
+        get_catalog_snapshot(tenant) if tenant else None,
+        [(item.get("produto_id"), _item_variacao_ids(item)) for item in items],
+        strict=True,
+    )
+    validos = []
+    indisponiveis = []
+    total = Decimal("0")
+    for item, linha in zip(items, linhas):
+        if not isinstance(linha, LinhaPrecificada):
+            indisponiveis.append(item)
+            continue
+        produto = linha.produto
+        validos.append(
+            {**item, "produto_id": produto.pk, "preco": linha.preco, "imagem": produto.imagem}
+        )
+        total += linha.preco * item["quantidade"]
+    return validos, total, indisponiveis
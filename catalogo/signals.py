@@ -0,0 +1,105 @@
+"""
+Invalidação central dos caches do catálogo.
+
+Qualquer gravação ou exclusão nos modelos que aparecem no catálogo (ou nas
+listas do painel) incrementa a versão do tenant em ``catalogo.versioning``.
+Todos os caches embutem essa versão na chave, então podem viver por horas e,
+ainda assim, uma edição aparece imediatamente. O incremento acontece depois do
+commit, para que nenhuma requisição reconstrua um cache da nova versão com
+dados ainda não confirmados.
+
+Alterações em ``TenantProfile`` também incrementam a versão global dos tenants,
+que valida a resolução slug/id -> tenant em ``catalogo.tenants``.
+
+Os incrementos de uma mesma transação são agrupados por tenant: salvar um
+produto com N variações incrementa a versão uma única vez no commit.
+
+``bulk_create``/``update()`` não disparam sinais: quem usa essas operações
+chama ``bump_catalog_version`` explicitamente.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from catalogo.models import CatalogProfile
+from catalogo.versioning import bump_catalog_version, bump_tenants_version
+from produtos.models import (
+    Categoria,
+    Produto,
+    ProdutoImagem,
+    Subcategoria,
+    Variacao,
+    VariacaoCategoria,
+)
+from tenants.models import TenantProfile
+
+
+def _produto_tenant_id(instance):
+    # Formsets e inlines já trazem o produto carregado; só consulta quando não.
+    if type(instance).produto.is_cached(instance):
+        return instance.produto.tenant_id
+    # Em exclusões em cascata o produto pode já ter sido removido; nesse caso o
+    # próprio post_delete do produto cuida do incremento.
+    return (
+        Produto.objects.filter(pk=instance.produto_id).values_list("tenant_id", flat=True).first()
+    )
+
+
+TENANT_RESOLVERS = {
+    Produto: lambda instance: instance.tenant_id,
+    Categoria: lambda instance: instance.tenant_id,
+    Subcategoria: lambda instance: instance.tenant_id,
+    CatalogProfile: lambda instance: instance.tenant_id,
+    TenantProfile: lambda instance: instance.pk,
+    Variacao: _produto_tenant_id,
+    VariacaoCategoria: _produto_tenant_id,
+    ProdutoImagem: _produto_tenant_id,
+}
+
+
+def _flush_catalog_bumps(connection):
+    pending = connection.catalogo_pending_bumps
+    tenant_ids = set(pending)
+    pending.clear()
+    for tenant_id in tenant_ids:
+        bump_catalog_version(tenant_id)
+
+
+def _schedule_catalog_bump(tenant_id):
+    """
+    Marca o tenant para incremento no commit da transação atual. Cada chamada
+    registra o ``on_commit`` (assim um rollback de savepoint não perde o
+    incremento), mas o primeiro a rodar esvazia o conjunto e os demais não
+    fazem nada.
+    """
+    connection = transaction.get_connection()
+    pending = getattr(connection, "catalogo_pending_bumps", None)
+    if pending is None:
+        pending = connection.catalogo_pending_bumps = set()
+    pending.add(tenant_id)
+    transaction.on_commit(lambda: _flush_catalog_bumps(connection))
+
+
+def invalidate_catalog(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    tenant_id = TENANT_RESOLVERS[sender](instance)
+    if tenant_id:
+        _schedule_catalog_bump(tenant_id)
+
+
+def invalidate_tenants(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    transaction.on_commit(bump_tenants_version)
+
+
+def connect_signals():
+    for model in TENANT_RESOLVERS:
+        uid = f"catalogo-invalidate-{model._meta.label_lower}"
+        post_save.connect(invalidate_catalog, sender=model, dispatch_uid=f"{uid}-save")
+        post_delete.connect(invalidate_catalog, sender=model, dispatch_uid=f"{uid}-delete")
+    post_save.connect(invalidate_tenants, sender=TenantProfile, dispatch_uid="catalogo-tenants-save")
+    post_delete.connect(
+        invalidate_tenants, sender=TenantProfile, dispatch_uid="catalogo-tenants-delete"
+    )
@@ -0,0 +1,231 @@
+"""
+Fotografia materializada do catálogo público de um tenant.
+
+Em vez de guardar um QuerySet (que precisa ser avaliado e ter os prefetchs
+refeitos a cada acerto), o catálogo é convertido uma vez em estruturas simples
+e imutáveis, já agrupadas por categoria e com as URLs (detalhe, carrinho e
+imagens) resolvidas. A fotografia fica no cache compartilhado sob a versão do
+catálogo (``catalogo.versioning``), então só é reconstruída quando algo muda;
+cada processo ainda mantém a última fotografia de cada tenant em memória para
+não precisar desserializá-la a cada requisição.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import groupby
+
+from django.core.cache import cache
+
+from catalogo.models import CatalogProfile
+from catalogo.versioning import get_catalog_version
+from core.urlformat import fast_reverse
+from produtos.models import Produto
+
+# O formato entra na chave para que uma mudança nas classes abaixo nunca
+# desserialize fotografias antigas.
+SNAPSHOT_FORMAT = 8
+SNAPSHOT_KEY = "catalogo:snapshot:{format}:{tenant_id}:{version}"
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+PROFILE_FIELDS = ("title", "message", "cta", "image", "desktop_image", "mobile_image")
+
+
+@dataclass(frozen=True, slots=True)
+class VariacaoItem:
+    pk: int
+    nome: str
+    tamanho: str
+    preco_adicional: Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class VariacaoGrupo:
+    pk: int  # id da VariacaoCategoria, 0 para variações sem categoria
+    nome: str
+    max_escolhas: int | None
+    variacoes: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class ProdutoItem:
+    pk: int
+    nome: str
+    descricao: str
+    preco: Decimal
+    categoria_nome: str
+    imagem: str  # URL original, gravada nos itens do pedido
+    detail_url: str
+    add_url: str
+    variacoes_url: str
+    image_url: str
+    thumb_url: str
+    image_srcset: str
+    gallery_urls: tuple
+    gallery_srcsets: tuple
+    variacao_grupos: tuple
+    variacoes_index: dict  # pk -> (VariacaoGrupo, VariacaoItem), usado por ``catalogo.pricing``
+
+    @property
+    def tem_variacoes(self):
+        return bool(self.variacao_grupos)
+
+    @property
+    def preco_max(self):
+        """Maior preço possível: em cada grupo, as ``max_escolhas`` opções mais caras."""
+        preco = self.preco
+        for grupo in self.variacao_grupos:
+            limite = 99 if grupo.max_escolhas is None else grupo.max_escolhas
+            adicionais = sorted(
+                (variacao.preco_adicional for variacao in grupo.variacoes if variacao.preco_adicional > 0),
+                reverse=True,
+            )
+            preco += sum(adicionais[:limite], Decimal("0"))
+        return preco
+
+    def get_variacao(self, pk):
+        entry = self.variacoes_index.get(pk)
+        return entry[1] if entry else None
+
+
+@dataclass(frozen=True, slots=True)
+class CategoriaSecao:
+    pk: int  # 0 para produtos sem categoria
+    nome: str
+    produtos: tuple
+
+    def produtos_apos(self, nome, pk):
+        """
+        Produtos que vêm depois de ``(nome, pk)`` na ordem da seção. O produto
+        de referência é localizado pelo id; se ele saiu do catálogo, a posição é
+        estimada comparando nome e id.
+        """
+        for index, produto in enumerate(self.produtos):
+            if produto.pk == pk:
+                return self.produtos[index + 1 :]
+        return tuple(produto for produto in self.produtos if (produto.nome, produto.pk) > (nome, pk))
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    version: int
+    secoes: tuple
+    perfil: dict
+    produtos: dict  # pk -> ProdutoItem, para o carrinho
+
+    def get_secao(self, pk):
+        for secao in self.secoes:
+            if secao.pk == pk:
+                return secao
+        return None
+
+
+def _variacao_grupos(produto):
+    # Ordenadas por grupo antes do groupby: opções cadastradas fora de ordem
+    # (Cor, Tamanho, Cor) não podem gerar o mesmo grupo duas vezes.
+    grupos = []
+    variacoes = sorted(
+        produto.variacoes.all(),
+        key=lambda variacao: (
+            variacao.categoria.nome if variacao.categoria else "",
+            variacao.categoria_id or 0,
+            variacao.pk,
+        ),
+    )
+    for categoria_id, items in groupby(variacoes, key=lambda variacao: variacao.categoria_id):
+        items = list(items)
+        categoria = items[0].categoria
+        grupos.append(
+            VariacaoGrupo(
+                pk=categoria_id or 0,
+                nome=categoria.nome if categoria else "",
+                max_escolhas=categoria.max_escolhas if categoria else None,
+                variacoes=tuple(
+                    VariacaoItem(
+                        pk=variacao.pk,
+                        nome=variacao.nome,
+                        tamanho=variacao.tamanho,
+                        preco_adicional=variacao.preco_adicional,
+                    )
+                    for variacao in items
+                ),
+            )
+        )
+    return tuple(grupos)
+
+
+def _variacoes_index(grupos):
+    return {variacao.pk: (grupo, variacao) for grupo in grupos for variacao in grupo.variacoes}
+
+
+def _produto_item(produto):
+    grupos = _variacao_grupos(produto)
+    return ProdutoItem(
+        pk=produto.pk,
+        nome=produto.nome,
+        descricao=produto.descricao,
+        preco=produto.preco,
+        categoria_nome=produto.categoria.nome if produto.categoria else "",
+        imagem=produto.imagem or "",
+        detail_url=fast_reverse("catalogo:produto", produto.pk),
+        add_url=fast_reverse("catalogo:carrinho_adicionar", produto.pk),
+        variacoes_url=fast_reverse("catalogo:produto_variacoes", produto.pk),
+        image_url=produto.get_cached_image_url(),
+        thumb_url=produto.get_cached_thumb_url(),
+        image_srcset=produto.get_cached_image_srcset(),
+        gallery_urls=tuple(produto.get_gallery_cached_urls()),
+        gallery_srcsets=tuple(produto.get_gallery_cached_srcsets()),
+        variacao_grupos=grupos,
+        variacoes_index=_variacoes_index(grupos),
+    )
+
+
+def _perfil(tenant):
+    record = CatalogProfile.objects.filter(tenant=tenant).first()
+    if not record:
+        return {}
+    return {field: getattr(record, field) for field in PROFILE_FIELDS if getattr(record, field)}
+
+
+def build_catalog_snapshot(tenant, version):
+    produtos = (
+        Produto.objects.filter(ativo=True, tenant=tenant)
+        .select_related("categoria")
+        .prefetch_related("variacoes__categoria", "imagens")
+        # O id desempata categorias de mesmo nome, que precisam ficar contíguas para o groupby.
+        .order_by("categoria__nome", "categoria_id", "nome", "id")
+    )
+    secoes = []
+    for categoria_id, items in groupby(produtos, key=lambda produto: produto.categoria_id):
+        items = [_produto_item(produto) for produto in items]
+        secoes.append(
+            CategoriaSecao(pk=categoria_id or 0, nome=items[0].categoria_nome, produtos=tuple(items))
+        )
+    return CatalogSnapshot(
+        version=version,
+        secoes=tuple(secoes),
+        perfil=_perfil(tenant),
+        produtos={produto.pk: produto for secao in secoes for produto in secao.produtos},
+    )
+
+
+_local = {}
+
+
+def get_catalog_snapshot(tenant):
+    """
+    Devolve a fotografia da versão atual do catálogo (``tenant`` pode ser o
+    objeto ou o id), gerando-a e gravando no cache compartilhado apenas quando
+    ela ainda não existe.
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    version = get_catalog_version(tenant_id)
+    local = _local.get(tenant_id)
+    if local is not None and local.version == version:
+        return local
+    key = SNAPSHOT_KEY.format(format=SNAPSHOT_FORMAT, tenant_id=tenant_id, version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_catalog_snapshot(tenant_id, version)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    _local[tenant_id] = snapshot
+    return snapshot
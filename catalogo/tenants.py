@@ -0,0 +1,61 @@
+"""
+Resolução do tenant do catálogo público sem consultas no caminho quente.
+
+Cada processo guarda em memória o resultado de ``identificador -> tenant``
+(slug ou id, incluindo "não encontrado") e o perfil do catálogo já mesclado com
+os valores padrão. As entradas carregam a versão em que foram lidas: a dos
+tenants (``get_tenants_version``) para a resolução e a do catálogo do tenant
+para o perfil. Basta uma leitura no cache compartilhado para validar a entrada;
+o banco só é consultado depois de uma alteração.
+"""
+
+import copy
+
+from catalogo.profile import get_default_catalog_profile, merge_catalog_profile
+from catalogo.snapshot import get_catalog_snapshot
+from catalogo.versioning import get_catalog_version, get_tenants_version
+from tenants.models import TenantProfile
+
+# Limita a memória usada por identificadores inexistentes (links antigos, bots).
+MAX_ENTRIES = 1024
+
+_tenants = {}
+_profiles = {}
+
+
+def _lookup(identifier):
+    if identifier.isdigit():
+        return TenantProfile.objects.filter(pk=int(identifier), is_active=True).first()
+    return TenantProfile.objects.filter(slug=identifier, is_active=True).first()
+
+
+def resolve_tenant(identifier):
+    """
+    Devolve o tenant ativo com esse slug ou id, ou ``None``. Cada chamada
+    recebe uma cópia própria, então nada gravado na instância vaza entre
+    requisições.
+    """
+    if not identifier:
+        return None
+    identifier = str(identifier)
+    version = get_tenants_version()
+    entry = _tenants.get(identifier)
+    if entry is None or entry[0] != version:
+        if len(_tenants) >= MAX_ENTRIES:
+            _tenants.clear()
+        entry = _tenants[identifier] = (version, _lookup(identifier))
+    tenant = entry[1]
+    return copy.copy(tenant) if tenant is not None else None
+
+
+def get_catalog_profile_data(tenant):
+    """Perfil do catálogo mesclado com os padrões, como usado no banner."""
+    if not tenant:
+        return get_default_catalog_profile()
+    tenant_id = getattr(tenant, "pk", tenant)
+    version = get_catalog_version(tenant_id)
+    entry = _profiles.get(tenant_id)
+    if entry is None or entry[0] != version:
+        snapshot = get_catalog_snapshot(tenant_id)
+        entry = _profiles[tenant_id] = (snapshot.version, merge_catalog_profile(snapshot.perfil))
+    return dict(entry[1])
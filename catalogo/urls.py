@@ -2,11 +2,15 @@ from django.urls import path
 
 from .views import (
     AdicionarAoCarrinhoView,
+    AdicionarLoteAoCarrinhoView,
     AtualizarCarrinhoView,
     CarrinhoView,
     CatalogoHomeView,
+    CatalogoSecaoView,
     CheckoutView,
     ProdutoDetailView,
+    ProdutoVariacoesView,
+    carrinho_resumo,
     produto_imagem_cache,
     produto_imagem_extra_cache,
 )
@@ -19,24 +23,42 @@ urlpatterns = [
         produto_imagem_cache,
         name="produto_imagem_principal",
     ),
+    path(
+        "imagem/principal/<int:produto_pk>/<int:largura>/",
+        produto_imagem_cache,
+        name="produto_imagem_principal",
+    ),
     path(
         "imagem/<int:imagem_pk>/",
         produto_imagem_extra_cache,
         name="produto_imagem_extra",
     ),
+    path(
+        "imagem/<int:imagem_pk>/<int:largura>/",
+        produto_imagem_extra_cache,
+        name="produto_imagem_extra",
+    ),
     path("", CatalogoHomeView.as_view(), name="home"),
     path("produto/<int:pk>/", ProdutoDetailView.as_view(), name="produto"),
+    path("produto/<int:pk>/variacoes/", ProdutoVariacoesView.as_view(), name="produto_variacoes"),
     path("carrinho/", CarrinhoView.as_view(), name="carrinho"),
+    path("carrinho/resumo/", carrinho_resumo, name="carrinho_resumo"),
     path(
         "carrinho/adicionar/<int:pk>/",
         AdicionarAoCarrinhoView.as_view(),
         name="carrinho_adicionar",
     ),
+    path(
+        "carrinho/lote/",
+        AdicionarLoteAoCarrinhoView.as_view(),
+        name="carrinho_adicionar_lote",
+    ),
     path(
         "carrinho/item/<str:pk>/atualizar/",
         AtualizarCarrinhoView.as_view(),
         name="carrinho_atualizar",
     ),
     path("checkout/", CheckoutView.as_view(), name="checkout"),
+    path("secao/<int:categoria_pk>/", CatalogoSecaoView.as_view(), name="secao"),
     path("<slug:tenant_identifier>/", CatalogoHomeView.as_view(), name="publico"),
 ]
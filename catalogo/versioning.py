@@ -0,0 +1,66 @@
+"""
+Versão do catálogo por tenant, usada para validar caches e ETags.
+
+O número fica no cache compartilhado e é trocado a cada alteração que muda o
+que o catálogo público exibe. A versão nova vem do relógio (em nanossegundos)
+e é gravada com ``cache.set``, em vez de ``cache.incr``: no cache em arquivos o
+``incr`` lê e regrava sem trava, e dois incrementos simultâneos podiam gerar o
+mesmo número, deixando um cache antigo válido. Com ``set`` cada alteração
+grava um valor diferente do anterior. Quando a chave não existe (cache limpo
+ou expirado) ela também recomeça a partir do relógio, para nunca repetir uma
+versão já entregue aos navegadores.
+
+Há também uma versão global dos tenants, trocada quando qualquer
+``TenantProfile`` muda, que invalida a resolução slug/id -> tenant.
+"""
+
+import time
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = "catalogo:version:{tenant_id}"
+TENANTS_VERSION_KEY = "tenants:version"
+
+
+def _tenant_id(tenant):
+    return getattr(tenant, "pk", tenant)
+
+
+def _fresh_version():
+    return time.time_ns()
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), None)
+        version = cache.get(key) or _fresh_version()
+    return version
+
+
+def _bump_version(key):
+    version = _fresh_version()
+    cache.set(key, version, None)
+    return version
+
+
+def get_catalog_version(tenant):
+    tenant_id = _tenant_id(tenant)
+    if not tenant_id:
+        return 0
+    return _get_version(CATALOG_VERSION_KEY.format(tenant_id=tenant_id))
+
+
+def bump_catalog_version(tenant):
+    tenant_id = _tenant_id(tenant)
+    if not tenant_id:
+        return 0
+    return _bump_version(CATALOG_VERSION_KEY.format(tenant_id=tenant_id))
+
+
+def get_tenants_version():
+    return _get_version(TENANTS_VERSION_KEY)
+
+
+def bump_tenants_version():
+    return _bump_version(TENANTS_VERSION_KEY)
@@ -1,106 +1,129 @@
 import hashlib
-from io import BytesIO
-
-from PIL import Image, UnidentifiedImageError
-import requests
-from requests.exceptions import RequestException
-
-from itertools import groupby
+import json
 
+from django.conf import settings
 from django.contrib import messages
 from django.core.cache import cache
 from django.db import transaction
-from django.http import Http404, HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.formats import number_format
+from django.utils.http import http_date, urlencode
 from django.views import View
-from django.views.decorators.cache import cache_page
 from django.views.decorators.http import require_GET
-from django.views.generic import DetailView, FormView, ListView, TemplateView
-
-from django.core.exceptions import ValidationError
+from django.views.generic import DetailView, FormView, TemplateView
 
 from catalogo.forms import CheckoutForm
-from catalogo.models import CatalogProfile
-from catalogo.profile import get_default_catalog_profile
-from catalogo.services import normalize_cart, serialize_cart
+from catalogo.images import (
+    IMAGE_CACHE_TIMEOUT,
+    content_type_for,
+    get_derivative,
+    negotiate_format,
+)
+from catalogo.cart import (
+    add_line,
+    change_quantity,
+    confirm_prices,
+    load_cart,
+    new_cart,
+    remove_line,
+    save_cart,
+)
+from catalogo.pricing import PricingError, price_line, price_lines
+from catalogo.services import (
+    get_cart_summary,
+    invalidate_cart_summary,
+    reprice_cart_items,
+    serialize_cart,
+    serialize_variacoes,
+)
+from catalogo.snapshot import SNAPSHOT_FORMAT, SNAPSHOT_TIMEOUT, get_catalog_snapshot
+from catalogo.tenants import get_catalog_profile_data, resolve_tenant
+from catalogo.versioning import get_catalog_version
+from core.pagination import decode_cursor, encode_cursor
 from pedidos.models import ItemPedido, Pedido
+from pedidos.uploads import enqueue_cover_upload
 from produtos.models import Produto, ProdutoImagem
-from produtos.services import upload_image_to_imgbb
-from tenants.models import TenantProfile
 
+# Produtos por seção na primeira renderização da home; o restante vem de
+# ``catalogo:secao`` conforme a rolagem.
+CATALOG_SECTION_SIZE = 12
+SECTION_PAGE_KEY = "catalogo:secao:{format}:{tenant_id}:{version}:{categoria}:{produto}"
 
-IMAGE_CACHE_TIMEOUT = 60 * 60 * 24  # one day
-IMAGE_MAX_DIMENSION = 900
-IMAGE_QUALITY = 78
 
+def _get_cached_image(url, width=None, fmt="jpeg"):
+    return get_derivative(url, width=width, fmt=fmt)
 
-def _get_cached_image(url):
-    if not url:
-        return None
-    cache_key = f"catalogo:image:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
-    try:
-        response = requests.get(url, timeout=8)
-        response.raise_for_status()
-        payload = response.content
-        image = Image.open(BytesIO(payload))
-        image = image.convert("RGB")
-        image.thumbnail((IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION), Image.LANCZOS)
-        output = BytesIO()
-        image.save(output, format="JPEG", quality=IMAGE_QUALITY, optimize=True)
-        data = output.getvalue()
-    except (RequestException, UnidentifiedImageError, OSError):
-        return None
-    cache.set(cache_key, data, IMAGE_CACHE_TIMEOUT)
-    return data
+
+def _image_etag(stored):
+    # O nome do arquivo é o hash da variante; o mtime muda se ela for regerada.
+    return f'"{stored.path.stem[:32]}-{int(stored.mtime * 1000):x}"'
 
 
-def _build_image_response(data):
-    response = HttpResponse(data, content_type="image/jpeg")
+def _set_image_headers(response, stored):
+    response["ETag"] = _image_etag(stored)
+    response["Last-Modified"] = http_date(stored.mtime)
     response["Cache-Control"] = f"public, max-age={IMAGE_CACHE_TIMEOUT}"
+    response["Vary"] = "Accept"
     return response
 
 
+def _build_image_response(stored, fmt):
+    try:
+        handle = open(stored.path, "rb")
+    except FileNotFoundError:
+        raise Http404("Imagem indisponível")
+    response = FileResponse(handle, content_type=content_type_for(fmt))
+    response["Content-Length"] = stored.size
+    return _set_image_headers(response, stored)
+
+
+def _serve_image(request, url, largura):
+    fmt = negotiate_format(request.headers.get("accept"))
+    stored = _get_cached_image(url, width=largura, fmt=fmt)
+    if not stored:
+        raise Http404("Imagem indisponível")
+    not_modified = get_conditional_response(
+        request, etag=_image_etag(stored), last_modified=int(stored.mtime)
+    )
+    if not_modified is not None:
+        return _set_image_headers(not_modified, stored)
+    return _build_image_response(stored, fmt)
+
+
 @require_GET
-@cache_page(IMAGE_CACHE_TIMEOUT)
-def produto_imagem_cache(request, produto_pk):
+def produto_imagem_cache(request, produto_pk, largura=None):
     produto = get_object_or_404(Produto, pk=produto_pk, ativo=True)
-    image_data = _get_cached_image(produto.imagem)
-    if not image_data:
-        raise Http404("Imagem indisponível")
-    return _build_image_response(image_data)
+    return _serve_image(request, produto.imagem, largura)
 
 
 @require_GET
-@cache_page(IMAGE_CACHE_TIMEOUT)
-def produto_imagem_extra_cache(request, imagem_pk):
+def produto_imagem_extra_cache(request, imagem_pk, largura=None):
     imagem = get_object_or_404(ProdutoImagem, pk=imagem_pk)
-    image_data = _get_cached_image(imagem.url)
-    if not image_data:
-        raise Http404("Imagem indisponível")
-    return _build_image_response(image_data)
+    return _serve_image(request, imagem.url, largura)
 
 
 def _get_cart(request):
-    return request.session.setdefault("cart", {})
+    return load_cart(request.session)
+
+
+def _save_cart(request, cart):
+    save_cart(request.session, cart)
+    invalidate_cart_summary(request)
 
 
-def _maybe_cart_json_response(request, cart):
+def _maybe_cart_json_response(request):
     if request.headers.get("x-requested-with") != "XMLHttpRequest":
         return None
-    summary = normalize_cart(cart)
-    return JsonResponse(serialize_cart(summary))
+    return JsonResponse(serialize_cart(get_cart_summary(request)))
 
 
 def _get_tenant_by_identifier(identifier):
-    if not identifier:
-        return None
-    if identifier.isdigit():
-        return TenantProfile.objects.filter(pk=int(identifier), is_active=True).first()
-    return TenantProfile.objects.filter(slug=identifier, is_active=True).first()
+    return resolve_tenant(identifier)
 
 
 def _resolve_shared_tenant(request):
@@ -112,12 +135,6 @@ def _get_request_tenant(request):
     return getattr(request, "tenant", None) or _resolve_shared_tenant(request)
 
 
-def _get_catalog_profile_for_tenant(tenant):
-    if not tenant:
-        return None
-    return CatalogProfile.objects.filter(tenant=tenant).first()
-
-
 class TenantAwareMixin:
     """
     Helper mixin that centralizes how the catalog identifies which tenant should
@@ -139,7 +156,9 @@ class TenantAwareMixin:
             tenant = _get_tenant_by_identifier(self.public_tenant_identifier)
             if tenant:
                 self.effective_tenant = tenant
-                request.session["public_catalog_identifier"] = self.public_tenant_identifier
+                # Só grava quando muda: reescrever o mesmo valor suja a sessão.
+                if session_identifier != self.public_tenant_identifier:
+                    request.session["public_catalog_identifier"] = self.public_tenant_identifier
         elif session_identifier:
             tenant = _get_tenant_by_identifier(session_identifier)
             if tenant:
@@ -151,154 +170,227 @@ class TenantAwareMixin:
     def get_effective_tenant(self):
         return self.effective_tenant
 
+    def get_catalog_tenant(self):
+        return self.get_effective_tenant()
 
-class CatalogoHomeView(TenantAwareMixin, ListView):
-    model = Produto
-    template_name = "catalogo/home.html"
-    context_object_name = "produtos"
-    cache_timeout = 30
 
-    def get_queryset(self):
-        tenant = self.get_effective_tenant()
-        if tenant:
-            cache_key = f"catalogo:home:{tenant.pk}"
-            cached = cache.get(cache_key)
-            if cached is not None:
-                return cached
-            qs = (
-                Produto.objects.filter(ativo=True, tenant=tenant)
-                .select_related("categoria")
-                .prefetch_related("variacoes__categoria", "variacoes", "imagens")
-                .order_by("categoria__nome", "nome")
-            )
-            cache.set(cache_key, qs, self.cache_timeout)
-            return qs
-        return Produto.objects.none()
+class CatalogConditionalMixin:
+    """
+    Answers catalog pages with a weak ETag so unchanged pages revalidate with a
+    304. The tag combines the tenant's catalog version with everything in the
+    page that depends on the visitor (user, cart and CSRF cookie), so a cart
+    change never reuses a stale page. ``SNAPSHOT_FORMAT`` and
+    ``settings.BUILD_ID`` are part of it too, so a deploy that changes the
+    templates does not revalidate the old HTML. Pages that load the cart through
+    ``carrinho_resumo`` set ``etag_includes_cart = False``.
+    """
+
+    etag_includes_cart = True
+
+    def get_catalog_tenant(self):
+        return _get_request_tenant(self.request)
+
+    def get_catalog_etag(self, tenant):
+        request = self.request
+        fingerprint = json.dumps(
+            [
+                SNAPSHOT_FORMAT,
+                settings.BUILD_ID,
+                tenant.pk,
+                request.get_full_path(),
+                request.user.pk if request.user.is_authenticated else None,
+                (request.session.get("cart") or {}) if self.etag_includes_cart else None,
+                request.META.get("CSRF_COOKIE"),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:20]
+        return f'W/"{get_catalog_version(tenant)}-{digest}"'
+
+    def get(self, request, *args, **kwargs):
+        tenant = self.get_catalog_tenant()
+        pending_messages = getattr(request, "_messages", None)
+        if not tenant or (pending_messages is not None and len(pending_messages)):
+            return super().get(request, *args, **kwargs)
+        etag = self.get_catalog_etag(tenant)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+def _secao_pagina(secao, produtos, tenant):
+    """
+    Primeiros ``CATALOG_SECTION_SIZE`` produtos de ``produtos`` e, se houver
+    mais, a URL que traz os seguintes (cursor com nome e id do último exibido).
+    """
+    pagina = produtos[:CATALOG_SECTION_SIZE]
+    more_url = None
+    if len(produtos) > CATALOG_SECTION_SIZE:
+        ultimo = pagina[-1]
+        query = urlencode(
+            {"tenant": tenant.slug or tenant.pk, "cursor": encode_cursor("next", [ultimo.nome, ultimo.pk])}
+        )
+        more_url = f"{reverse('catalogo:secao', args=[secao.pk])}?{query}"
+    return {"pk": secao.pk, "nome": secao.nome, "produtos": pagina, "more_url": more_url}
+
+
+def _variacoes_query(tenant, snapshot):
+    # A versão na URL deixa o navegador guardar a resposta até o catálogo mudar.
+    return urlencode({"tenant": tenant.slug or tenant.pk, "v": snapshot.version})
+
+
+class CatalogoHomeView(TenantAwareMixin, CatalogConditionalMixin, TemplateView):
+    """
+    O corpo da página (banner e seções de produtos) é cacheado como HTML por
+    tenant e versão do catálogo; o carrinho chega depois via ``carrinho_resumo``.
+    """
+
+    template_name = "catalogo/home.html"
+    etag_includes_cart = False
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         tenant = self.get_effective_tenant()
-        profile_data = get_default_catalog_profile()
-        profile_record = _get_catalog_profile_for_tenant(tenant)
-        if profile_record:
-            if profile_record.title:
-                profile_data["title"] = profile_record.title
-            if profile_record.message:
-                profile_data["message"] = profile_record.message
-            if profile_record.cta:
-                profile_data["cta"] = profile_record.cta
-            desktop_source = profile_record.desktop_image or profile_record.image
-            if desktop_source:
-                profile_data["desktop_image"] = desktop_source
-                profile_data["image"] = desktop_source
-            if profile_record.mobile_image:
-                profile_data["mobile_image"] = profile_record.mobile_image
-            elif profile_record.desktop_image:
-                profile_data["mobile_image"] = profile_record.desktop_image
-            elif profile_record.image:
-                profile_data["mobile_image"] = profile_record.image
+        snapshot = get_catalog_snapshot(tenant) if tenant else None
+        profile_data = get_catalog_profile_data(tenant)
         context["profile_data"] = profile_data
         context["banner_image"] = profile_data["desktop_image"]
+        context["produtos_por_categoria"] = (
+            [_secao_pagina(secao, secao.produtos, tenant) for secao in snapshot.secoes] if snapshot else ()
+        )
+        # O formato entra na chave: mudar a fotografia também invalida o HTML.
+        context["catalog_fragment_key"] = (
+            (SNAPSHOT_FORMAT, tenant.pk, snapshot.version) if snapshot else None
+        )
+        context["catalog_fragment_timeout"] = SNAPSHOT_TIMEOUT
+        context["variacoes_query"] = _variacoes_query(tenant, snapshot) if snapshot else ""
+        context["cart_from_json"] = True
+        return context
 
-        produtos = list(context.get("produtos", []))
-        grouped = []
-        for categoria, items in groupby(produtos, key=lambda prod: getattr(prod, "categoria", None)):
-            grouped.append({"categoria": categoria, "produtos": list(items)})
-        context["produtos_por_categoria"] = grouped
 
-        return context
+class CatalogoSecaoView(TenantAwareMixin, View):
+    """
+    Próxima página de uma seção da home, em HTML pronto para anexar à grade.
+    O HTML fica no cache sob a versão do catálogo, como o corpo da home.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request, categoria_pk, *args, **kwargs):
+        tenant = self.get_effective_tenant()
+        cursor = decode_cursor(request.GET.get("cursor"), 2)
+        if not tenant or cursor is None:
+            raise Http404("Seção indisponível")
+        nome, pk = cursor[1]
+        if not isinstance(nome, str) or not isinstance(pk, int):
+            raise Http404("Seção indisponível")
+        snapshot = get_catalog_snapshot(tenant)
+        key = SECTION_PAGE_KEY.format(
+            format=SNAPSHOT_FORMAT,
+            tenant_id=tenant.pk,
+            version=snapshot.version,
+            categoria=categoria_pk,
+            produto=pk,
+        )
+        payload = cache.get(key)
+        if payload is None:
+            secao = snapshot.get_secao(categoria_pk)
+            if secao is None:
+                raise Http404("Seção indisponível")
+            pagina = _secao_pagina(secao, secao.produtos_apos(nome, pk), tenant)
+            payload = {
+                "html": render_to_string(
+                    "catalogo/partials/produto_cards.html",
+                    {"produtos": pagina["produtos"], "variacoes_query": _variacoes_query(tenant, snapshot)},
+                ),
+                "next": pagina["more_url"],
+            }
+            cache.set(key, payload, SNAPSHOT_TIMEOUT)
+        return JsonResponse(payload)
+
+
+class ProdutoVariacoesView(TenantAwareMixin, View):
+    """
+    Variações de um produto (grupos, ``max_escolhas`` e acréscimos) em JSON,
+    lidas da fotografia do catálogo. A home só indica se o produto tem
+    variações; o modal busca a árvore aqui quando é aberto.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request, pk, *args, **kwargs):
+        tenant = self.get_effective_tenant()
+        snapshot = get_catalog_snapshot(tenant) if tenant else None
+        produto = snapshot.produtos.get(pk) if snapshot else None
+        if produto is None:
+            raise Http404("Produto indisponível")
+        response = JsonResponse(serialize_variacoes(produto))
+        if request.GET.get("v") == str(snapshot.version):
+            response["Cache-Control"] = f"private, max-age={SNAPSHOT_TIMEOUT}"
+        else:
+            response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+def _get_tenant_cart(request, tenant_id):
+    cart = _get_cart(request)
+    if cart["t"] is None:
+        cart["t"] = tenant_id
+    elif cart["t"] != tenant_id:
+        # Cada carrinho pertence a um único catálogo.
+        cart = new_cart(tenant_id)
+    return cart
+
+
+def _parse_quantity(raw):
+    try:
+        quantity = int(raw or 1)
+    except (TypeError, ValueError):
+        quantity = 1
+    return max(1, min(quantity, 999))
+
+
+def _add_priced_line(cart, linha, quantity, version):
+    add_line(
+        cart,
+        linha.item_key,
+        linha.produto.pk,
+        linha.variacao_ids,
+        quantity,
+        linha.preco,
+        version,
+    )
 
 
 class AdicionarAoCarrinhoView(View):
     def post(self, request, pk, *args, **kwargs):
         tenant = _get_request_tenant(request)
-        produto = get_object_or_404(Produto, pk=pk, ativo=True, tenant=tenant)
-        cart = _get_cart(request)
+        snapshot = get_catalog_snapshot(tenant) if tenant else None
+        produto = snapshot.produtos.get(pk) if snapshot else None
+        if produto is None:
+            raise Http404("Produto indisponível")
         variacao_ids = request.POST.getlist("variacoes") or []
-        try:
-            quantity = int(request.POST.get("quantity") or 1)
-        except (TypeError, ValueError):
-            quantity = 1
-        quantity = max(1, min(quantity, 999))
+        quantity = _parse_quantity(request.POST.get("quantity"))
         single_variacao = request.POST.get("variacao_id")
         if single_variacao and single_variacao not in variacao_ids:
             variacao_ids.append(single_variacao)
-        if not variacao_ids:
-            variacao_ids = [None]
-
-        variacoes_map = {
-            str(v.pk): v for v in produto.variacoes.select_related("categoria").all()
-        }
-
-        selecionadas = []
-        for raw_id in variacao_ids:
-            if raw_id and str(raw_id) not in variacoes_map:
-                continue
-            variacao = variacoes_map.get(str(raw_id)) if raw_id else None
-            if variacao:
-                selecionadas.append(variacao)
-        if not selecionadas and variacao_ids == [None]:
-            selecionadas = [None]
-
-        # valida limite por categoria
-        cat_contagem = {}
-        violacao_msg = ""
-        for variacao in selecionadas:
-            if variacao is None:
-                continue
-            cat_key = variacao.categoria_id or "none"
-            limite = variacao.categoria.max_escolhas if variacao.categoria else 99
-            atual = cat_contagem.get(cat_key, 0) + 1
-            cat_contagem[cat_key] = atual
-            if atual > limite:
-                nome_cat = variacao.categoria.nome if variacao.categoria else "variações"
-                violacao_msg = f"Selecione no máximo {limite} opção(ões) em {nome_cat}."
-                break
-
-        if violacao_msg:
+
+        try:
+            linha = price_line(produto, variacao_ids)
+        except PricingError as exc:
             if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"error": violacao_msg}, status=400)
-            messages.error(request, violacao_msg)
+                return JsonResponse({"error": str(exc)}, status=400)
+            messages.error(request, str(exc))
             fallback = request.POST.get("next") or request.META.get("HTTP_REFERER")
             return redirect(fallback or reverse("catalogo:home"))
 
-        def _build_label(variacao):
-            if not variacao:
-                return ""
-            parts = [variacao.nome]
-            if variacao.tamanho:
-                parts.append(variacao.tamanho)
-            return " / ".join(parts)
-
-        variacao_ids_sorted = sorted(str(v.pk) for v in selecionadas if v)
-        item_key = str(produto.pk)
-        if variacao_ids_sorted:
-            item_key = f"{produto.pk}:{'-'.join(variacao_ids_sorted)}"
-
-        preco = produto.preco
-        labels = []
-        variacao_id = None
-        if selecionadas != [None]:
-            for variacao in selecionadas:
-                preco += variacao.preco_adicional
-                labels.append(_build_label(variacao))
-            if selecionadas:
-                variacao_id = selecionadas[0].pk
-
-        if item_key not in cart:
-            cart[item_key] = {
-                "produto_id": produto.pk,
-                "nome": produto.nome,
-                "preco": str(preco),
-                "imagem": produto.imagem or "",
-                "quantidade": 0,
-                "variacao_id": variacao_id,
-                "variacao_label": ", ".join(labels) if labels else "",
-                "variacoes_ids": variacao_ids_sorted,
-                "variacoes_labels": labels,
-            }
-        cart[item_key]["quantidade"] += quantity
-        request.session.modified = True
+        cart = _get_tenant_cart(request, tenant.pk)
+        _add_priced_line(cart, linha, quantity, snapshot.version)
+        _save_cart(request, cart)
 
         destination = request.POST.get("destination")
         if destination == "cart":
@@ -306,7 +398,7 @@ class AdicionarAoCarrinhoView(View):
         if destination == "checkout":
             return redirect(reverse("catalogo:checkout"))
 
-        ajax_response = _maybe_cart_json_response(request, cart)
+        ajax_response = _maybe_cart_json_response(request)
         if ajax_response:
             return ajax_response
 
@@ -314,26 +406,77 @@ class AdicionarAoCarrinhoView(View):
         return redirect(fallback or reverse("catalogo:home"))
 
 
+class AdicionarLoteAoCarrinhoView(View):
+    """
+    Inclui vários itens no carrinho numa única requisição. O corpo é JSON::
+
+        {"itens": [{"produto": 12, "variacoes": [3, 7], "quantidade": 2}, ...]}
+
+    Todos os itens são precificados com uma leitura da fotografia; se algum
+    for inválido nada é incluído e a resposta (400) lista os erros por posição.
+    """
+
+    max_itens = 100
+
+    def post(self, request, *args, **kwargs):
+        tenant = _get_request_tenant(request)
+        if not tenant:
+            return JsonResponse({"error": "Nenhuma papelaria ativa."}, status=400)
+        try:
+            payload = json.loads(request.body or b"{}")
+            itens = payload["itens"]
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"error": "Envie os itens em JSON."}, status=400)
+        if not isinstance(itens, list) or not itens:
+            return JsonResponse({"error": "Nenhum item informado."}, status=400)
+        if len(itens) > self.max_itens:
+            return JsonResponse(
+                {"error": f"Envie no máximo {self.max_itens} itens por vez."}, status=400
+            )
+
+        pedidos = []
+        for item in itens:
+            if not isinstance(item, dict):
+                item = {}
+            variacoes = item.get("variacoes") or []
+            if not isinstance(variacoes, list):
+                variacoes = [variacoes]
+            pedidos.append((item.get("produto"), [str(raw_id) for raw_id in variacoes]))
+        snapshot = get_catalog_snapshot(tenant)
+        linhas = price_lines(snapshot, pedidos)
+        erros = [
+            {"index": index, "error": str(linha)}
+            for index, linha in enumerate(linhas)
+            if isinstance(linha, PricingError)
+        ]
+        if erros:
+            return JsonResponse({"errors": erros}, status=400)
+
+        cart = _get_tenant_cart(request, tenant.pk)
+        for item, linha in zip(itens, linhas):
+            quantity = _parse_quantity(item.get("quantidade") if isinstance(item, dict) else None)
+            _add_priced_line(cart, linha, quantity, snapshot.version)
+        _save_cart(request, cart)
+        return JsonResponse(serialize_cart(get_cart_summary(request)))
+
+
 class AtualizarCarrinhoView(View):
     def post(self, request, pk, *args, **kwargs):
         cart = _get_cart(request)
         item_key = request.POST.get("item_key") or str(pk)
-        if item_key in cart:
-            action = request.POST.get("cart_action") or request.POST.get("action")
-            if action == "remove":
-                cart.pop(item_key, None)
-            elif action == "decrement":
-                cart[item_key]["quantidade"] = max(0, cart[item_key]["quantidade"] - 1)
-                if cart[item_key]["quantidade"] == 0:
-                    cart.pop(item_key, None)
-        request.session.modified = True
-        ajax_response = _maybe_cart_json_response(request, cart)
+        action = request.POST.get("cart_action") or request.POST.get("action")
+        if action == "remove":
+            remove_line(cart, item_key)
+        elif action == "decrement":
+            change_quantity(cart, item_key, -1)
+        _save_cart(request, cart)
+        ajax_response = _maybe_cart_json_response(request)
         if ajax_response:
             return ajax_response
         return redirect(request.POST.get("next") or reverse("catalogo:carrinho"))
 
 
-class ProdutoDetailView(DetailView):
+class ProdutoDetailView(CatalogConditionalMixin, DetailView):
     model = Produto
     template_name = "catalogo/produto_detail.html"
 
@@ -349,13 +492,25 @@ class ProdutoDetailView(DetailView):
         return qs.none()
 
 
+@require_GET
+def carrinho_resumo(request):
+    """
+    Resumo do carrinho em JSON. As páginas com corpo em cache (como a home do
+    catálogo) preenchem o contador e o modal do carrinho a partir daqui.
+    """
+    data = serialize_cart(get_cart_summary(request))
+    data["csrf_token"] = get_token(request)
+    response = JsonResponse(data)
+    response["Cache-Control"] = "private, no-store"
+    return response
+
+
 class CarrinhoView(TemplateView):
     template_name = "catalogo/carrinho.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        cart = _get_cart(self.request)
-        summary = normalize_cart(cart)
+        summary = get_cart_summary(self.request)
         context["cart_items"] = summary["items"]
         context["cart_total"] = summary["total"]
         return context
@@ -366,12 +521,27 @@ class CheckoutView(FormView):
     form_class = CheckoutForm
 
     def _get_cart_summary(self):
-        cart = _get_cart(self.request)
-        return normalize_cart(cart)
+        return get_cart_summary(self.request)
 
     def _clear_cart(self):
-        self.request.session["cart"] = {}
-        self.request.session.modified = True
+        _save_cart(self.request, new_cart())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["itens_preco_alterado"] = [
+            item for item in self._get_cart_summary()["items"] if item["preco_anterior"] is not None
+        ]
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Os preços antigos já estão no contexto desta página; a partir daqui o
+        # cliente os viu e o próximo envio segue com os preços novos.
+        if context["itens_preco_alterado"]:
+            cart = _get_cart(self.request)
+            if confirm_prices(cart):
+                _save_cart(self.request, cart)
+        return response
 
     def form_valid(self, form):
         tenant = _get_request_tenant(self.request)
@@ -384,51 +554,71 @@ class CheckoutView(FormView):
             messages.error(self.request, "Seu carrinho está vazio. Adicione itens antes de finalizar.")
             return redirect(reverse("catalogo:home"))
 
+        if summary["precos_alterados"]:
+            alterados = "; ".join(
+                f"{item['nome']}: R$ {number_format(item['preco'], 2)} "
+                f"(antes R$ {number_format(item['preco_anterior'], 2)})"
+                for item in summary["items"]
+                if item["preco_anterior"] is not None
+            )
+            messages.warning(
+                self.request,
+                f"O preço de alguns itens mudou desde que foram adicionados ({alterados}). "
+                "Confira o total e finalize novamente.",
+            )
+            return redirect(reverse("catalogo:checkout"))
+
+        itens, total, indisponiveis = reprice_cart_items(summary["items"], tenant)
+        if indisponiveis:
+            cart = _get_cart(self.request)
+            for item in indisponiveis:
+                remove_line(cart, item["item_key"])
+            _save_cart(self.request, cart)
+            messages.error(
+                self.request,
+                "Alguns itens do carrinho não estão mais disponíveis e foram removidos. "
+                "Confira o carrinho antes de finalizar.",
+            )
+            return redirect(reverse("catalogo:checkout"))
+
         contato = form.cleaned_data.get("nome", "").strip()
         telefone = form.cleaned_data.get("telefone", "").strip()
         nome_capa = form.cleaned_data.get("nome_capa", "").strip()
         capa = form.cleaned_data.get("capa")
         contra_capa = form.cleaned_data.get("contra_capa")
-        capa_url = ""
-        contra_capa_url = ""
         if telefone:
             contato = f"{contato} ({telefone})" if contato else telefone
 
-        # Upload para IMGBB quando o arquivo for enviado.
-        try:
-            if capa:
-                capa_url = upload_image_to_imgbb(capa)
-            if contra_capa:
-                contra_capa_url = upload_image_to_imgbb(contra_capa)
-        except ValidationError as exc:
-            messages.error(self.request, exc.messages[0] if exc.messages else "Erro ao enviar imagens.")
-            return redirect(reverse("catalogo:checkout"))
-
+        # As capas ficam no storage local; o envio ao IMGBB acontece em segundo
+        # plano depois que o pedido já está registrado.
+        linhas = [
+            ItemPedido(
+                produto_id=item["produto_id"],
+                produto=item["nome"] or f"Produto {item['produto_id']}",
+                quantidade=item["quantidade"],
+                preco_unitario=item["preco"],
+                imagem=item.get("imagem"),
+            )
+            for item in itens
+        ]
         with transaction.atomic():
             pedido = Pedido.objects.create(
                 tenant=tenant,
                 cliente=contato or "Cliente",
                 telefone=telefone,
-                total=summary["total"],
+                total=total,
                 nome_capa=nome_capa,
-                capa_url=capa_url,
-                contra_capa_url=contra_capa_url,
+                capa=capa or None,
+                contra_capa=contra_capa or None,
+                imagens_status="pending" if capa or contra_capa else "",
+                itens_resumo=[linha.as_resumo() for linha in linhas],
             )
+            for linha in linhas:
+                linha.pedido = pedido
+            ItemPedido.objects.bulk_create(linhas)
 
-            for item in summary["items"]:
-                raw_id = item.get("produto_id")
-                try:
-                    produto_id = int(raw_id)
-                except (TypeError, ValueError):
-                    produto_id = None
-                ItemPedido.objects.create(
-                    pedido=pedido,
-                    produto_id=produto_id,
-                    produto=item["nome"] or f"Produto {item['produto_id']}",
-                    quantidade=item["quantidade"],
-                    preco_unitario=item["preco"],
-                    imagem=item.get("imagem"),
-                )
+            if capa or contra_capa:
+                enqueue_cover_upload(pedido.pk)
 
         self._clear_cart()
         messages.success(
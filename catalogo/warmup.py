@@ -0,0 +1,76 @@
+"""
+Pré-aquecimento das derivadas de imagem fora do ciclo da requisição.
+
+Quando um produto ganha uma imagem nova, as variantes são geradas por um pool
+de threads local ao processo, para que o primeiro visitante do catálogo já
+encontre tudo em disco. Não há broker externo: se o processo reiniciar com
+tarefas pendentes, elas simplesmente voltam a ser geradas sob demanda.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from catalogo.constants import IMAGE_WIDTHS
+from catalogo.images import DEFAULT_FORMAT, NEGOTIATED_FORMATS, get_derivative
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_WARM_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_WARM_WORKERS", DEFAULT_WARM_WORKERS),
+                thread_name_prefix="image-warm",
+            )
+    return _executor
+
+
+def warm_image(url):
+    """Gera todas as variantes da URL; devolve quantas ficaram disponíveis."""
+    if not url:
+        return 0
+    if not get_derivative(url):
+        LOGGER.warning("Não foi possível pré-aquecer a imagem %s", url)
+        return 0
+    ready = 0
+    for fmt in [DEFAULT_FORMAT, *NEGOTIATED_FORMATS]:
+        for width in IMAGE_WIDTHS:
+            if get_derivative(url, width=width, fmt=fmt):
+                ready += 1
+    return ready
+
+
+def _warm_safely(url):
+    try:
+        return warm_image(url)
+    except Exception:
+        LOGGER.exception("Falha ao pré-aquecer a imagem %s", url)
+        return 0
+
+
+def enqueue_image_warmup(urls):
+    """
+    Agenda o pré-aquecimento das URLs após o commit da transação atual, para não
+    gerar imagens de registros que acabaram revertidos.
+    """
+    urls = [url for url in dict.fromkeys(urls) if url]
+    if not urls:
+        return
+
+    def _submit():
+        executor = _get_executor()
+        for url in urls:
+            executor.submit(_warm_safely, url)
+
+    transaction.on_commit(_submit)
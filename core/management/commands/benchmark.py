@@ -0,0 +1,350 @@
+"""
+Benchmark dos caminhos quentes do catálogo, do checkout e do painel.
+
+Cria (ou reaproveita) um tenant por tamanho de catálogo, com produtos,
+variações e imagens apontando para um servidor HTTP local que também faz o
+papel do IMGBB. Cada cenário é medido com o ``Client`` de testes do Django:
+latência, consultas ao banco e memória alocada (``tracemalloc``). O resultado
+sai em JSON para comparar commits::
+
+    python manage.py benchmark --sizes 10 100 500 --repeat 20 --output var/benchmark.json
+
+Tudo roda num banco de teste descartável (o mesmo que o ``manage.py test``
+criaria), com cache em memória e mídia num diretório temporário; nada é
+gravado no banco, no cache ou no storage configurados. Fora do SQLite o banco
+de teste é criado no servidor configurado, por isso o comando exige
+``--allow-non-sqlite`` nesse caso.
+"""
+
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+from django.utils import timezone
+from PIL import Image
+
+from catalogo.versioning import bump_catalog_version
+from pedidos import uploads
+from produtos.models import Categoria, Produto, ProdutoImagem, Variacao, VariacaoCategoria
+from tenants.models import TenantProfile
+
+CATEGORIAS = 5
+IMAGENS_POR_PRODUTO = 2
+GRUPOS_VARIACAO = (("Tamanho", ("P", "M", "G")), ("Cor", ("Azul", "Rosa", "Verde")))
+BENCHMARK_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark"},
+    "sessions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark-sessions",
+    },
+}
+
+
+def _png_bytes(size=(1200, 900), color=(210, 90, 140)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """GET devolve um PNG (imagens dos produtos); POST responde como o IMGBB."""
+
+    image = b""
+    uploads = 0
+
+    def do_GET(self):
+        self._reply(200, "image/png", self.image)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).uploads += 1
+        host, port = self.server.server_address[:2]
+        body = json.dumps(
+            {"status": 200, "data": {"url": f"http://{host}:{port}/capa-{self.uploads}.png"}}
+        ).encode("utf-8")
+        self._reply(200, "application/json", body)
+
+    def _reply(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _summary(values):
+    ordered = sorted(values)
+    return {
+        "min": round(ordered[0], 3),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Mede latência, consultas e alocações dos caminhos quentes do catálogo e do painel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10, 100, 500],
+            help="Quantidades de produtos por tenant.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Requisições medidas por cenário.",
+        )
+        parser.add_argument(
+            "--stub-port",
+            type=int,
+            default=8765,
+            help="Porta do servidor local de imagens/IMGBB (fica gravada nas URLs dos produtos).",
+        )
+        parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout).")
+        parser.add_argument(
+            "--allow-non-sqlite",
+            action="store_true",
+            help="Permite criar o banco de teste num servidor que não seja SQLite.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite" and not options["allow_non_sqlite"]:
+            host = connection.settings_dict.get("HOST") or "local"
+            raise CommandError(
+                f"O banco configurado é {connection.vendor} ({host}). Rode com um banco SQLite "
+                "(DATABASE_URL=sqlite:///...) ou passe --allow-non-sqlite."
+            )
+        repeat = max(1, options["repeat"])
+        _StubHandler.image = _png_bytes()
+        server = ThreadingHTTPServer(("127.0.0.1", options["stub_port"]), _StubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        stub_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        results = {}
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with tempfile.TemporaryDirectory(prefix="benchmark-") as work_dir, override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                CACHES=BENCHMARK_CACHES,
+                IMAGE_CACHE_DIR=f"{work_dir}/imagens",
+                MEDIA_ROOT=f"{work_dir}/media",
+                IMGBB_UPLOAD_URL=f"{stub_url}/1/upload",
+            ):
+                for size in options["sizes"]:
+                    tenant = self._seed(size, stub_url)
+                    self.stderr.write(f"Medindo bench-{size} ({size} produtos)...")
+                    results[str(size)] = self._run_scenarios(tenant, repeat)
+                # Os envios de capa do checkout precisam terminar antes de o banco sumir.
+                uploads._get_executor().shutdown(wait=True)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            server.shutdown()
+            server.server_close()
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": repeat,
+                "imgbb_uploads": _StubHandler.uploads,
+            },
+            "results": results,
+        }
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Resultados gravados em {options['output']}."))
+        else:
+            self.stdout.write(payload)
+
+    # Dados -----------------------------------------------------------------
+
+    def _seed(self, size, stub_url):
+        slug = f"bench-{size}"
+        self.stderr.write(f"Criando {slug} com {size} produtos...")
+        with transaction.atomic():
+            # Sem senha: o painel é medido com ``force_login``.
+            user = get_user_model().objects.create_user(username=slug, email=f"{slug}@benchmark.local")
+            tenant = TenantProfile.objects.create(user=user, slug=slug, nome_negocio=f"Benchmark {size}")
+            categorias = Categoria.objects.bulk_create(
+                [Categoria(nome=f"Categoria {index}", tenant=tenant) for index in range(CATEGORIAS)]
+            )
+            produtos = Produto.objects.bulk_create(
+                [
+                    Produto(
+                        tenant=tenant,
+                        nome=f"Produto {index:04d}",
+                        descricao="Produto gerado para benchmark.",
+                        preco=Decimal("10.00") + index % 50,
+                        estoque=100,
+                        imagem=f"{stub_url}/produto-{size}-{index}.png",
+                        categoria=categorias[index % CATEGORIAS],
+                    )
+                    for index in range(size)
+                ]
+            )
+            grupos = VariacaoCategoria.objects.bulk_create(
+                [
+                    VariacaoCategoria(produto=produto, nome=nome, max_escolhas=1)
+                    for produto in produtos
+                    for nome, _ in GRUPOS_VARIACAO
+                ]
+            )
+            opcoes = dict(GRUPOS_VARIACAO)
+            Variacao.objects.bulk_create(
+                [
+                    Variacao(
+                        produto_id=grupo.produto_id,
+                        categoria=grupo,
+                        nome=opcao,
+                        tamanho=opcao if grupo.nome == "Tamanho" else "",
+                        preco_adicional=Decimal("1.50") * position,
+                    )
+                    for grupo in grupos
+                    for position, opcao in enumerate(opcoes[grupo.nome])
+                ]
+            )
+            ProdutoImagem.objects.bulk_create(
+                [
+                    ProdutoImagem(produto=produto, url=f"{stub_url}/extra-{produto.pk}-{index}.png")
+                    for produto in produtos
+                    for index in range(IMAGENS_POR_PRODUTO)
+                ]
+            )
+            # bulk_create não dispara os sinais de invalidação.
+            transaction.on_commit(lambda: bump_catalog_version(tenant.pk))
+        return tenant
+
+    # Cenários --------------------------------------------------------------
+
+    def _run_scenarios(self, tenant, repeat):
+        produtos = list(
+            Produto.objects.filter(tenant=tenant).order_by("pk").values_list("pk", flat=True)
+        )
+        variacoes = {}
+        for variacao in Variacao.objects.filter(produto_id__in=produtos[:repeat]).order_by("pk"):
+            variacoes.setdefault(variacao.produto_id, []).append(str(variacao.pk))
+
+        visitante = Client()
+        painel = Client()
+        painel.force_login(tenant.user)
+        home_url = f"/catalogo/{tenant.slug}/"
+        cover = _png_bytes((600, 800), (40, 120, 200))
+
+        def produto(index):
+            return produtos[index % len(produtos)]
+
+        def adicionar(index):
+            pk = produto(index)
+            return visitante.post(
+                f"/catalogo/carrinho/adicionar/{pk}/",
+                {"quantity": 1, "variacoes": variacoes.get(pk, [])[:1]},
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            )
+
+        def checkout(index):
+            return visitante.post(
+                "/catalogo/checkout/",
+                {
+                    "nome": "Cliente Benchmark",
+                    "telefone": "11999991234",
+                    "capa": SimpleUploadedFile("capa.png", cover, content_type="image/png"),
+                },
+            )
+
+        scenarios = [
+            ("catalogo_home", None, lambda index: visitante.get(home_url)),
+            ("produto_detalhe", None, lambda index: visitante.get(f"/catalogo/produto/{produto(index)}/")),
+            ("carrinho_adicionar", None, adicionar),
+            ("checkout", adicionar, checkout),
+            ("pedido_lista", None, lambda index: painel.get("/pedidos/")),
+            (
+                "imagem_proxy_fria",
+                None,
+                lambda index: visitante.get(f"/catalogo/imagem/principal/{produto(index)}/400/"),
+            ),
+            (
+                "imagem_proxy_cache",
+                None,
+                lambda index: visitante.get(f"/catalogo/imagem/principal/{produtos[0]}/400/"),
+            ),
+        ]
+
+        # A home vem primeiro: além de medida, ela grava o tenant na sessão do visitante.
+        return {name: self._measure(run, setup, repeat) for name, setup, run in scenarios}
+
+    def _measure(self, run, setup, repeat):
+        latencies, queries, statuses = [], [], set()
+        for index in range(repeat):
+            if setup:
+                setup(index)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = run(index)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses.add(response.status_code)
+            if hasattr(response, "close"):
+                response.close()
+
+        # Alocações numa execução extra, para o tracemalloc não distorcer a latência.
+        if setup:
+            setup(repeat)
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            response = run(repeat)
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        response.close()
+
+        return {
+            "latency_ms": _summary(latencies),
+            "first_ms": round(latencies[0], 3),
+            "queries": {"first": queries[0], "mean": round(statistics.fmean(queries), 2), "max": max(queries)},
+            "alloc_kib": {"net": round((after - before) / 1024, 1), "peak": round(peak / 1024, 1)},
+            "status": sorted(statuses),
+        }
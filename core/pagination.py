@@ -0,0 +1,180 @@
+"""
+Paginação por cursor (keyset) para as listagens do painel.
+
+Em vez de ``OFFSET``/``COUNT(*)``, cada página filtra a partir da última linha
+exibida usando as colunas da ordenação (que devem terminar em uma coluna
+única, como ``id``). O custo de uma página profunda fica igual ao da primeira.
+Os cursores são opacos para o navegador: JSON em base64 com a direção e os
+valores da linha de referência.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def _serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [_serialize(value) for value in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, size, fields=None):
+    """
+    Devolve ``(direcao, valores)`` ou ``None`` para cursores inválidos. Com
+    ``fields`` (campos do model, na ordem dos valores), cada valor é convertido
+    pelo ``to_python`` do campo; valores que não convertem invalidam o cursor.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        direction, values = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if direction not in ("next", "prev") or not isinstance(values, list) or len(values) != size:
+        return None
+    if fields is not None:
+        try:
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if any(value is None for value in values):
+            return None
+    return direction, values
+
+
+def _model_field(model, path):
+    field = None
+    for name in path.split("__"):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    if field.is_relation:
+        field = field.target_field
+    return field
+
+
+def _split(ordering):
+    return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+
+def _reverse(ordering):
+    return [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+
+def _after(fields, values):
+    """
+    Condição "vem depois de ``values``" na ordenação ``fields``:
+    ``(a > x) OR (a = x AND b > y) ...``, respeitando as colunas descendentes.
+    """
+    condition = Q()
+    for index, (name, descending) in enumerate(fields):
+        lookup = "lt" if descending else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[index]})
+        for position, (previous, _) in enumerate(fields[:index]):
+            clause &= Q(**{previous: values[position]})
+        condition |= clause
+    return condition
+
+
+class KeysetPage:
+    """Página compatível com o ``page_obj`` usado pelos templates/ListView."""
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _cursor(self, direction, obj):
+        values = [getattr(obj, name) for name, _ in _split(self.ordering)]
+        return encode_cursor(direction, values)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return ""
+        return self._cursor("next", self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return ""
+        return self._cursor("prev", self.object_list[0])
+
+
+def keyset_paginate(queryset, ordering, cursor, per_page):
+    """
+    Recorta ``queryset`` a partir do ``cursor`` (token de ``KeysetPage``).
+    Busca ``per_page + 1`` linhas para saber se existe próxima página, sem
+    ``COUNT(*)``. Cursores inválidos voltam para a primeira página.
+    """
+    fields = _split(ordering)
+    try:
+        model_fields = [_model_field(queryset.model, name) for name, _ in fields]
+    except FieldDoesNotExist:
+        model_fields = None
+    decoded = decode_cursor(cursor, len(fields), model_fields)
+    if decoded is None:
+        rows = list(queryset.order_by(*ordering)[: per_page + 1])
+        return KeysetPage(rows[:per_page], ordering, len(rows) > per_page, False)
+
+    direction, values = decoded
+    if direction == "next":
+        rows = list(queryset.filter(_after(fields, values)).order_by(*ordering)[: per_page + 1])
+        return KeysetPage(rows[:per_page], ordering, len(rows) > per_page, True)
+
+    reversed_ordering = _reverse(ordering)
+    rows = list(
+        queryset.filter(_after(_split(reversed_ordering), values)).order_by(*reversed_ordering)[
+            : per_page + 1
+        ]
+    )
+    has_previous = len(rows) > per_page
+    rows = rows[:per_page]
+    rows.reverse()
+    return KeysetPage(rows, ordering, True, has_previous)
+
+
+class KeysetPaginationMixin:
+    """
+    Substitui a paginação por offset de uma ``ListView``. O template recebe o
+    ``page_obj`` com ``next_cursor``/``previous_cursor``; ``paginator`` fica
+    ``None`` porque não há contagem total.
+    """
+
+    keyset_ordering = ("-id",)
+    cursor_param = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        page = keyset_paginate(
+            queryset, list(self.keyset_ordering), self.request.GET.get(self.cursor_param), page_size
+        )
+        return (None, page, page.object_list, page.has_other_pages())
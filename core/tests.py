@@ -0,0 +1,34 @@
+import base64
+import json
+
+from django.test import SimpleTestCase
+
+from core.pagination import _model_field, decode_cursor, encode_cursor
+from pedidos.models import Pedido
+
+
+def _token(payload):
+    raw = json.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class DecodeCursorTests(SimpleTestCase):
+    def setUp(self):
+        self.fields = [_model_field(Pedido, "created_on"), _model_field(Pedido, "id")]
+
+    def test_valores_convertidos_pelos_campos(self):
+        token = encode_cursor("next", ["2024-05-01T10:00:00+00:00", "7"])
+        direction, values = decode_cursor(token, 2, self.fields)
+        self.assertEqual(direction, "next")
+        self.assertEqual(values[0].isoformat(), "2024-05-01T10:00:00+00:00")
+        self.assertEqual(values[1], 7)
+
+    def test_valores_adulterados_invalidam_o_cursor(self):
+        for values in ([{"a": 1}, 2], ["2024-05-01T10:00:00", "abc"], [None, 2], ["ontem", 2]):
+            with self.subTest(values=values):
+                self.assertIsNone(decode_cursor(_token(["next", values]), 2, self.fields))
+
+    def test_formato_invalido(self):
+        self.assertIsNone(decode_cursor("???", 2, self.fields))
+        self.assertIsNone(decode_cursor(_token(["sideways", ["x", 1]]), 2, self.fields))
+        self.assertIsNone(decode_cursor(_token(["next", [1]]), 2, self.fields))
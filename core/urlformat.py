@@ -0,0 +1,40 @@
+"""
+``reverse()`` sem passar pelo resolvedor a cada chamada.
+
+Para rotas cujos argumentos são inteiros não negativos, a URL é resolvida uma
+única vez com valores-sentinela e guardada como modelo
+(``"/catalogo/produto/{0}/"``); as chamadas seguintes só formatam a string. O
+modelo é guardado por prefixo de script e URLconf, então continua correto atrás
+de um ``SCRIPT_NAME``. Rotas com outros tipos de argumento caem no
+``reverse()`` normal.
+"""
+
+from django.conf import settings
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+_SENTINEL = 9_876_543_210
+_templates = {}
+
+
+def _build_template(viewname, size):
+    sentinels = [str(_SENTINEL + index) for index in range(size)]
+    url = reverse(viewname, args=sentinels)
+    if any(url.count(sentinel) != 1 for sentinel in sentinels):
+        return None
+    template = url.replace("{", "{{").replace("}", "}}")
+    for index, sentinel in enumerate(sentinels):
+        template = template.replace(sentinel, f"{{{index}}}")
+    return template
+
+
+def fast_reverse(viewname, *args):
+    if not all(type(arg) is int and arg >= 0 for arg in args):
+        return reverse(viewname, args=args)
+    key = (get_script_prefix(), get_urlconf() or settings.ROOT_URLCONF, viewname, len(args))
+    try:
+        template = _templates[key]
+    except KeyError:
+        template = _templates[key] = _build_template(viewname, len(args))
+    if template is None:
+        return reverse(viewname, args=args)
+    return template.format(*args)
@@ -1,16 +1,50 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, SESSION_KEY
 from django.utils.deprecation import MiddlewareMixin
 
-from tenants.models import TenantProfile
+from tenants.cache import get_cached_tenant
+
+TENANT_SESSION_KEY = "tenant_id"
+
+
+def _resolve_from_session(request):
+    """
+    Caminho rápido: usa o ``tenant_id`` da sessão para obter o tenant do cache.
+    Devolve ``None`` quando a sessão não traz tenant ou ele não pertence ao
+    usuário da sessão; nesse caso o tenant vem de ``request.user``.
+    """
+    session = request.session
+    tenant_id = session.get(TENANT_SESSION_KEY)
+    user_id = session.get(SESSION_KEY)
+    if not tenant_id or not user_id:
+        return None
+    if session.get(BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    tenant = get_cached_tenant(tenant_id)
+    if tenant is None or str(tenant.user_id) != str(user_id):
+        return None
+    return tenant
 
 
 class TenantMiddleware(MiddlewareMixin):
     """
     Attach the tenant profile to every request. If the user is authenticated and has a
-    profile we reuse it, otherwise we leave tenant unset.
+    profile we reuse it, otherwise we leave tenant unset. Sessions that carry
+    ``tenant_id`` read the tenant from the cache instead of the database.
     """
 
     def process_request(self, request):
-        tenant = None
+        tenant = _resolve_from_session(request)
+        if tenant is not None:
+            # A autenticação padrão carrega o usuário e confere o hash da sessão.
+            user = request.user
+            if user.is_authenticated and user.pk == tenant.user_id:
+                tenant.user = user
+                request.tenant = tenant
+                return
+            tenant = None
         if request.user.is_authenticated:
             tenant = getattr(request.user, "tenant_profile", None)
+            if tenant and request.session.get(TENANT_SESSION_KEY) != tenant.pk:
+                request.session[TENANT_SESSION_KEY] = tenant.pk
         request.tenant = tenant
@@ -0,0 +1,95 @@
+"""
+Sessões em dois níveis: cache compartilhado primeiro, banco só quando vale.
+
+A maior parte das sessões do catálogo público é de visitantes anônimos que só
+guardam o tenant do link compartilhado; elas ficam apenas no cache
+(``SESSION_CACHE_ALIAS``). Sessões com itens no carrinho ou com usuário
+autenticado também são gravadas em ``django_session``, mas em write-behind: a
+primeira gravação vai direto ao banco e as seguintes no máximo uma vez a cada
+``SESSION_DB_WRITE_INTERVAL`` segundos. O cache é sempre a fonte da leitura; o
+banco é a cópia durável caso a entrada do cache seja descartada. Com o
+intervalo em 0 toda alteração é gravada no banco na hora.
+
+O engine só é usado com Redis (``REDIS_URL``); sem ele as configurações
+voltam para ``django.contrib.sessions.backends.db``.
+
+Quando a sessão deixa de precisar do banco (carrinho finalizado ou esvaziado),
+a linha é removida. Linhas expiradas são limpas com
+``python manage.py purge_sessions``.
+"""
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY as AUTH_SESSION_KEY
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.db import router
+
+from catalogo.cart import SESSION_KEY as CART_SESSION_KEY
+from catalogo.cart import cart_has_items
+
+DEFAULT_DB_WRITE_INTERVAL = 60
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = "papelaria_multi.sessions"
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._persisted = False
+
+    @staticmethod
+    def needs_database(data):
+        return bool(data.get(AUTH_SESSION_KEY)) or cart_has_items(data.get(CART_SESSION_KEY))
+
+    def load(self):
+        data = super().load()
+        # Uma sessão que precisa do banco já foi gravada nele ao chegar nesse estado.
+        self._persisted = self.needs_database(data)
+        return data
+
+    @property
+    def _db_marker_key(self):
+        return f"{self.cache_key}:db"
+
+    def _db_write_due(self, force):
+        interval = getattr(settings, "SESSION_DB_WRITE_INTERVAL", DEFAULT_DB_WRITE_INTERVAL)
+        if interval <= 0:
+            return True
+        if force:
+            self._cache.set(self._db_marker_key, True, interval)
+            return True
+        return self._cache.add(self._db_marker_key, True, interval)
+
+    def _save_to_cache(self, data, must_create):
+        age = self.get_expiry_age()
+        if must_create:
+            if not self._cache.add(self.cache_key, data, age):
+                raise CreateError
+        else:
+            self._cache.set(self.cache_key, data, age)
+
+    def _save_to_db(self, must_create):
+        if must_create:
+            DBStore.save(self, must_create=True)
+            return
+        obj = self.create_model_instance(self._get_session())
+        obj.save(using=router.db_for_write(self.model, instance=obj))
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        self._save_to_cache(data, must_create)
+        if self.needs_database(data):
+            if self._db_write_due(force=must_create or not self._persisted):
+                self._save_to_db(must_create)
+                self._persisted = True
+        elif self._persisted:
+            DBStore.delete(self, self.session_key)
+            self._persisted = False
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None or session_key == self.session_key:
+            self._persisted = False
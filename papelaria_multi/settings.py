@@ -10,6 +10,16 @@ SECRET_KEY = os.environ.get(
 )
 DEBUG = os.getenv("DEBUG", "True") == "True"
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 60  # 60 dias para PWA manter sessao
+# Com Redis, sessões anônimas ficam só no cache "sessions"; carrinhos e logins
+# também vão para o banco, no máximo uma vez a cada SESSION_DB_WRITE_INTERVAL
+# segundos. Sem Redis as sessões ficam só no banco: o cache em arquivos varre o
+# diretório inteiro a cada gravação e nunca encolhe sozinho.
+if os.getenv("REDIS_URL"):
+    SESSION_ENGINE = "papelaria_multi.sessions"
+    SESSION_CACHE_ALIAS = "sessions"
+else:
+    SESSION_ENGINE = "django.contrib.sessions.backends.db"
+SESSION_DB_WRITE_INTERVAL = int(os.getenv("SESSION_DB_WRITE_INTERVAL", "60"))
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -75,6 +85,29 @@ if not DATABASES["default"]:
         "PORT": "5432",
     }
 
+# Cache compartilhado entre os workers (versões do catálogo, listas em cache).
+# Com REDIS_URL definido o Redis é usado; caso contrário, arquivos em disco.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        },
+        "sessions": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+            "KEY_PREFIX": "sessions",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR", str(BASE_DIR / "var" / "cache")),
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        },
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -117,10 +150,17 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 STATICFILES_STORAGE = "whitenoise.storage.CompressedStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Derivadas redimensionadas das imagens do catálogo (compartilhadas entre workers).
+IMAGE_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", BASE_DIR / "var" / "imagens"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Identificador do deploy (ex.: hash do commit), embutido nos ETags do catálogo
+# para que uma mudança de template ou código não responda 304 com a página antiga.
+BUILD_ID = os.getenv("BUILD_ID") or os.getenv("RENDER_GIT_COMMIT", "")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 IMGBB_API_KEY = os.environ.get(
     "IMGBB_API_KEY", "a351d106aae17d2ea4c334d798162573"
 )
+IMGBB_UPLOAD_URL = os.environ.get("IMGBB_UPLOAD_URL", "https://api.imgbb.com/1/upload")
 LOGIN_URL = "login"
 LOGOUT_REDIRECT_URL = "login"
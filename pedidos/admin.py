@@ -10,6 +10,10 @@ class ItemPedidoInline(admin.TabularInline):
 
 @admin.register(Pedido)
 class PedidoAdmin(admin.ModelAdmin):
-    list_display = ("cliente", "created_on", "status", "total")
-    list_filter = ("status",)
+    list_display = ("cliente", "created_on", "status", "total", "imagens_status")
+    list_filter = ("status", "imagens_status")
     inlines = [ItemPedidoInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.refresh_itens_resumo()
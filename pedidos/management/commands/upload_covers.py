@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from pedidos.models import Pedido
+from pedidos.uploads import upload_pedido_covers
+
+
+class Command(BaseCommand):
+    help = "Reenvia ao IMGBB as capas de pedidos que ficaram pendentes ou falharam."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--attempts",
+            type=int,
+            default=3,
+            help="Tentativas por pedido antes de marcá-lo como falho.",
+        )
+
+    def handle(self, *args, **options):
+        pendentes = Pedido.objects.filter(imagens_status__in=["pending", "failed"]).values_list(
+            "pk", flat=True
+        )
+        enviados = 0
+        falhas = 0
+        for pedido_id in list(pendentes):
+            if upload_pedido_covers(pedido_id, max_attempts=max(1, options["attempts"])):
+                enviados += 1
+            else:
+                falhas += 1
+        self.stdout.write(self.style.SUCCESS(f"{enviados} pedidos enviados; {falhas} com falha."))
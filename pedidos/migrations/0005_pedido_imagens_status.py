@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pedidos", "0004_pedido_capa_urls"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pedido",
+            name="imagens_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "Sem imagens"),
+                    ("pending", "Enviando imagens"),
+                    ("uploaded", "Imagens enviadas"),
+                    ("failed", "Falha no envio das imagens"),
+                ],
+                default="",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="pedido",
+            name="imagens_tentativas",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
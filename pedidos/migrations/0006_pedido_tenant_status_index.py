@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pedidos", "0005_pedido_imagens_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pedido",
+            index=models.Index(
+                fields=["tenant", "status", "created_on"], name="pedido_tenant_status_data"
+            ),
+        ),
+    ]
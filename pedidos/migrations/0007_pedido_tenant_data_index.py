@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pedidos", "0006_pedido_tenant_status_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pedido",
+            index=models.Index(fields=["tenant", "-created_on", "-id"], name="pedido_tenant_data"),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+def backfill_itens_resumo(apps, schema_editor):
+    Pedido = apps.get_model("pedidos", "Pedido")
+    batch = []
+    for pedido in Pedido.objects.prefetch_related("itens").iterator(chunk_size=500):
+        pedido.itens_resumo = [
+            {
+                "produto": item.produto,
+                "quantidade": item.quantidade,
+                "preco_unitario": str(item.preco_unitario),
+                "imagem": item.imagem or "",
+            }
+            for item in pedido.itens.all()
+        ]
+        batch.append(pedido)
+        if len(batch) == 500:
+            Pedido.objects.bulk_update(batch, ["itens_resumo"])
+            batch = []
+    if batch:
+        Pedido.objects.bulk_update(batch, ["itens_resumo"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pedidos", "0007_pedido_tenant_data_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pedido",
+            name="itens_resumo",
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name="Resumo dos itens"),
+        ),
+        migrations.RunPython(backfill_itens_resumo, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,12 @@ class Pedido(models.Model):
         ("processing", "Em processamento"),
         ("finished", "Finalizado"),
     ]
+    IMAGENS_STATUS_CHOICES = [
+        ("", "Sem imagens"),
+        ("pending", "Enviando imagens"),
+        ("uploaded", "Imagens enviadas"),
+        ("failed", "Falha no envio das imagens"),
+    ]
 
     tenant = models.ForeignKey(
         "tenants.TenantProfile",
@@ -26,13 +32,32 @@ class Pedido(models.Model):
     contra_capa = models.ImageField(upload_to="pedidos/", null=True, blank=True)
     capa_url = models.URLField(blank=True, null=True)
     contra_capa_url = models.URLField(blank=True, null=True)
+    imagens_status = models.CharField(
+        max_length=16, choices=IMAGENS_STATUS_CHOICES, blank=True, default=""
+    )
+    imagens_tentativas = models.PositiveSmallIntegerField(default=0)
+    # Cópia das linhas de ``itens`` gravada no checkout; a listagem do painel lê
+    # só este campo, sem carregar ``ItemPedido``.
+    itens_resumo = models.JSONField("Resumo dos itens", default=list, blank=True, editable=False)
 
     class Meta:
         ordering = ["-created_on"]
+        indexes = [
+            models.Index(fields=["tenant", "status", "created_on"], name="pedido_tenant_status_data"),
+            models.Index(fields=["tenant", "-created_on", "-id"], name="pedido_tenant_data"),
+        ]
 
     def __str__(self):
         return f"{self.cliente} ({self.created_on:%d/%m/%Y})"
 
+    def refresh_itens_resumo(self, itens=None):
+        """Regrava ``itens_resumo`` a partir de ``itens`` (ou das linhas no banco)."""
+        if itens is None:
+            itens = self.itens.all()
+        self.itens_resumo = [item.as_resumo() for item in itens]
+        if self.pk:
+            self.save(update_fields=["itens_resumo"])
+
 
 class ItemPedido(models.Model):
     pedido = models.ForeignKey(Pedido, related_name="itens", on_delete=models.CASCADE)
@@ -44,3 +69,11 @@ class ItemPedido(models.Model):
 
     def __str__(self):
         return f"{self.produto} x {self.quantidade}"
+
+    def as_resumo(self):
+        return {
+            "produto": self.produto,
+            "quantidade": self.quantidade,
+            "preco_unitario": str(self.preco_unitario),
+            "imagem": self.imagem or "",
+        }
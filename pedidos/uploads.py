@@ -0,0 +1,99 @@
+"""
+Envio das capas do pedido para o IMGBB depois que o pedido já foi aceito.
+
+No checkout os arquivos ficam apenas gravados no storage local
+(``Pedido.capa``/``contra_capa``). Um pool de threads do próprio processo envia
+cada arquivo, preenche ``capa_url``/``contra_capa_url`` e tenta de novo com
+espera exponencial quando o IMGBB falha. Pedidos que ficarem pendentes (por
+exemplo, após um reinício) podem ser reprocessados com
+``python manage.py upload_covers``.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+
+from produtos.services import upload_image_to_imgbb
+
+from .models import Pedido
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 2
+COVER_FIELDS = (("capa", "capa_url"), ("contra_capa", "contra_capa_url"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cover-upload")
+    return _executor
+
+
+def _upload_pending_files(pedido):
+    for file_field, url_field in COVER_FIELDS:
+        stored = getattr(pedido, file_field)
+        if not stored or getattr(pedido, url_field):
+            continue
+        with stored.open("rb") as image_file:
+            url = upload_image_to_imgbb(image_file)
+        setattr(pedido, url_field, url)
+        pedido.save(update_fields=[url_field])
+        # O arquivo local era só um rascunho até o upload concluir.
+        stored.delete(save=False)
+        pedido.save(update_fields=[file_field])
+
+
+def upload_pedido_covers(pedido_id, max_attempts=MAX_ATTEMPTS, sleep=time.sleep):
+    """
+    Envia as capas pendentes do pedido. Devolve ``True`` quando tudo foi
+    enviado e ``False`` quando as tentativas se esgotaram.
+    """
+    try:
+        for attempt in range(max_attempts):
+            pedido = Pedido.objects.filter(pk=pedido_id).first()
+            if not pedido:
+                return False
+            try:
+                _upload_pending_files(pedido)
+            except (ValidationError, OSError) as exc:
+                pedido.imagens_tentativas += 1
+                pedido.save(update_fields=["imagens_tentativas"])
+                LOGGER.warning(
+                    "Falha ao enviar capas do pedido %s (tentativa %s): %s",
+                    pedido_id,
+                    attempt + 1,
+                    exc,
+                )
+                if attempt + 1 < max_attempts:
+                    sleep(BACKOFF_SECONDS * 2**attempt)
+                continue
+            pedido.imagens_status = "uploaded"
+            pedido.save(update_fields=["imagens_status"])
+            return True
+        Pedido.objects.filter(pk=pedido_id).update(imagens_status="failed")
+        LOGGER.error("Capas do pedido %s não foram enviadas após %s tentativas", pedido_id, max_attempts)
+        return False
+    finally:
+        connections.close_all()
+
+
+def _upload_safely(pedido_id):
+    try:
+        return upload_pedido_covers(pedido_id)
+    except Exception:
+        LOGGER.exception("Erro inesperado ao enviar as capas do pedido %s", pedido_id)
+        return False
+
+
+def enqueue_cover_upload(pedido_id):
+    transaction.on_commit(lambda: _get_executor().submit(_upload_safely, pedido_id))
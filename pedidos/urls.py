@@ -1,11 +1,12 @@
 from django.urls import path
 
-from .views import PedidoDeleteView, PedidoListView, PedidoStatusUpdateView
+from .views import PedidoDeleteView, PedidoListJSONView, PedidoListView, PedidoStatusUpdateView
 
 app_name = "pedidos"
 
 urlpatterns = [
     path("", PedidoListView.as_view(), name="lista"),
+    path("pagina/", PedidoListJSONView.as_view(), name="lista_json"),
     path("status/<int:pk>/", PedidoStatusUpdateView.as_view(), name="status"),
     path("excluir/<int:pk>/", PedidoDeleteView.as_view(), name="excluir"),
 ]
@@ -1,46 +1,89 @@
+from django.db.models import Count
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
 from django.views.generic import ListView
 
+from core.pagination import KeysetPaginationMixin
+
 from .models import Pedido
 
 
-class PedidoListView(ListView):
+class PedidoListView(KeysetPaginationMixin, ListView):
     model = Pedido
     template_name = "pedidos/pedido_list.html"
     context_object_name = "pedidos"
     paginate_by = 10
+    keyset_ordering = ("-created_on", "-id")
 
     def get_queryset(self):
         tenant = getattr(self.request, "tenant", None)
         qs = super().get_queryset()
         self.base_queryset = qs.none()
         if tenant:
-            self.base_queryset = qs.filter(tenant=tenant).order_by("-created_on")
+            self.base_queryset = qs.filter(tenant=tenant).order_by(*self.keyset_ordering)
             return self.base_queryset
         return qs.none()
 
+    def _get_status_counts(self):
+        """Contagem por status em uma única consulta agrupada."""
+        if not hasattr(self, "_status_counts"):
+            tenant = getattr(self.request, "tenant", None)
+            self._status_counts = {}
+            if tenant:
+                self._status_counts = dict(
+                    Pedido.objects.filter(tenant=tenant)
+                    .order_by()
+                    .values_list("status")
+                    .annotate(total=Count("pk"))
+                )
+        return self._status_counts
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         tenant = getattr(self.request, "tenant", None)
         if tenant:
-            pedidos = Pedido.objects.filter(tenant=tenant)
-            stats = []
-            for value, label in Pedido.STATUS_CHOICES:
-                stats.append(
-                    {
-                        "value": value,
-                        "label": label,
-                        "count": pedidos.filter(status=value).count(),
-                    }
-                )
-            context["status_counts"] = stats
+            counts = self._get_status_counts()
+            context["status_counts"] = [
+                {"value": value, "label": label, "count": counts.get(value, 0)}
+                for value, label in Pedido.STATUS_CHOICES
+            ]
         else:
             context["status_counts"] = []
         return context
 
 
+class PedidoListJSONView(PedidoListView):
+    """Mesma página da listagem em JSON, para rolagem infinita."""
+
+    def get_context_data(self, **kwargs):
+        # Só a página interessa; a contagem por status fica para o HTML.
+        return ListView.get_context_data(self, **kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context["page_obj"]
+        pedidos = [
+            {
+                "id": pedido.id,
+                "cliente": pedido.cliente,
+                "telefone": pedido.telefone,
+                "total": str(pedido.total),
+                "status": pedido.status,
+                "status_label": pedido.get_status_display(),
+                "created_on": pedido.created_on.isoformat(),
+                "nome_capa": pedido.nome_capa,
+                "capa": pedido.capa_url or "",
+                "contra_capa": pedido.contra_capa_url or "",
+                "imagens_status": pedido.imagens_status,
+                "itens": pedido.itens_resumo,
+            }
+            for pedido in page
+        ]
+        return JsonResponse(
+            {"pedidos": pedidos, "next": page.next_cursor, "previous": page.previous_cursor}
+        )
+
+
 class PedidoStatusUpdateView(View):
     def post(self, request, pk):
         tenant = getattr(request, "tenant", None)
@@ -1,4 +1,5 @@
 from django import forms
+from django.core import signing
 from django.core.exceptions import ValidationError
 from django.forms import inlineformset_factory
 
@@ -70,6 +71,12 @@ class ProdutoForm(forms.ModelForm):
         widget=MultiFileInput(attrs={"class": "form-input", "multiple": True}),
         help_text="Envie quantas fotos extras desejar para o produto.",
     )
+    # Fotos extras já enviadas ao IMGBB num envio anterior que falhou na imagem
+    # principal; assinadas para que o navegador não consiga trocar as URLs.
+    imagens_enviadas = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    UPLOADED_SALT = "produtos.imagens_enviadas"
+    UPLOADED_MAX_AGE = 60 * 60 * 24
 
     class Meta:
         model = Produto
@@ -112,6 +119,21 @@ class ProdutoForm(forms.ModelForm):
                 tenant=tenant
             )
 
+    def clean_imagens_enviadas(self):
+        token = self.cleaned_data.get("imagens_enviadas")
+        if not token:
+            return []
+        try:
+            return signing.loads(token, salt=self.UPLOADED_SALT, max_age=self.UPLOADED_MAX_AGE)
+        except signing.BadSignature:
+            return []
+
+    def remember_uploaded_images(self, urls):
+        """Devolve ``urls`` no campo oculto para o próximo envio do formulário."""
+        data = self.data.copy()
+        data["imagens_enviadas"] = signing.dumps(list(urls), salt=self.UPLOADED_SALT) if urls else ""
+        self.data = data
+
 
 class VariacaoForm(forms.ModelForm):
     categoria_nome = forms.CharField(
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("produtos", "0008_remove_categoria_categoria_tenant_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="produto",
+            index=models.Index(fields=["tenant", "nome", "id"], name="prod_tenant_nome"),
+        ),
+    ]
@@ -1,5 +1,11 @@
 from django.db import models
-from django.urls import reverse
+
+from catalogo.constants import IMAGE_MAX_DIMENSION, IMAGE_WIDTHS
+from core.urlformat import fast_reverse
+
+
+def _build_srcset(url_for_width):
+    return ", ".join(f"{url_for_width(width)} {width}w" for width in IMAGE_WIDTHS)
 
 
 class Categoria(models.Model):
@@ -47,23 +53,43 @@ class Produto(models.Model):
 
     class Meta:
         ordering = ["nome"]
+        indexes = [
+            models.Index(fields=["tenant", "nome", "id"], name="prod_tenant_nome"),
+        ]
 
-    def get_cached_image_url(self):
+    def get_cached_image_url(self, width=None):
         if not self.imagem:
             return ""
-        return reverse("catalogo:produto_imagem_principal", args=[self.pk])
+        args = (self.pk, width) if width and width < IMAGE_MAX_DIMENSION else (self.pk,)
+        return fast_reverse("catalogo:produto_imagem_principal", *args)
 
-    def get_gallery_cached_urls(self):
+    def get_cached_thumb_url(self):
+        return self.get_cached_image_url(IMAGE_WIDTHS[0])
+
+    def get_cached_image_srcset(self):
+        if not self.imagem:
+            return ""
+        return _build_srcset(self.get_cached_image_url)
+
+    def get_gallery_cached_urls(self, width=None):
         urls = []
-        main_url = self.get_cached_image_url()
+        main_url = self.get_cached_image_url(width)
         if main_url:
             urls.append(main_url)
         for foto in self.imagens.all():
-            cached = foto.get_cached_image_url()
+            cached = foto.get_cached_image_url(width)
             if cached:
                 urls.append(cached)
         return urls
 
+    def get_gallery_cached_srcsets(self):
+        srcsets = []
+        if self.imagem:
+            srcsets.append(self.get_cached_image_srcset())
+        for foto in self.imagens.all():
+            srcsets.append(foto.get_cached_image_srcset())
+        return srcsets
+
 class ProdutoImagem(models.Model):
     produto = models.ForeignKey(
         Produto, on_delete=models.CASCADE, related_name="imagens"
@@ -77,8 +103,15 @@ class ProdutoImagem(models.Model):
     class Meta:
         ordering = ["-criado_em"]
 
-    def get_cached_image_url(self):
-        return reverse("catalogo:produto_imagem_extra", args=[self.pk])
+    def get_cached_image_url(self, width=None):
+        args = (self.pk, width) if width and width < IMAGE_MAX_DIMENSION else (self.pk,)
+        return fast_reverse("catalogo:produto_imagem_extra", *args)
+
+    def get_cached_thumb_url(self):
+        return self.get_cached_image_url(IMAGE_WIDTHS[0])
+
+    def get_cached_image_srcset(self):
+        return _build_srcset(self.get_cached_image_url)
 
 class Subcategoria(models.Model):
     categoria = models.ForeignKey(
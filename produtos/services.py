@@ -1,14 +1,36 @@
 import base64
 import io
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 from PIL import Image
 import requests
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from requests.adapters import HTTPAdapter
 
 LOGGER = logging.getLogger(__name__)
 IMGBB_UPLOAD_URL = "https://api.imgbb.com/1/upload"
+IMGBB_TIMEOUT = 15
+UPLOAD_MAX_WORKERS = 4
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def _get_http_session():
+    """Sessão HTTP compartilhada, reaproveitando conexões TLS com o IMGBB."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+    return _http_session
 
 
 def _compress_image(image_file, max_size=1600, quality=82):
@@ -43,7 +65,8 @@ def upload_image_to_imgbb(image_file):
             "image": base64.b64encode(_compress_image(image_file)).decode("ascii"),
         }
 
-        response = requests.post(IMGBB_UPLOAD_URL, data=payload, timeout=15)
+        upload_url = getattr(settings, "IMGBB_UPLOAD_URL", IMGBB_UPLOAD_URL)
+        response = _get_http_session().post(upload_url, data=payload, timeout=IMGBB_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         if LOGGER.isEnabledFor(logging.DEBUG):
@@ -66,3 +89,38 @@ def upload_image_to_imgbb(image_file):
     except (ValueError, KeyError) as exc:
         LOGGER.exception("Resposta inválida do IMGBB")
         raise ValidationError("Resposta inesperada do serviço de imagens.") from exc
+
+
+@dataclass(frozen=True)
+class UploadResult:
+    name: str
+    url: str = ""
+    error: str = ""
+
+    @property
+    def ok(self):
+        return bool(self.url)
+
+
+def _upload_one(image_file):
+    name = getattr(image_file, "name", "imagem")
+    try:
+        return UploadResult(name=name, url=upload_image_to_imgbb(image_file))
+    except ValidationError as exc:
+        message = exc.messages[0] if exc.messages else "Falha ao enviar a imagem."
+        return UploadResult(name=name, error=message)
+
+
+def upload_images_to_imgbb(image_files, max_workers=UPLOAD_MAX_WORKERS):
+    """
+    Comprime e envia várias imagens ao mesmo tempo, com no máximo
+    ``max_workers`` uploads simultâneos. Devolve um ``UploadResult`` por arquivo,
+    na mesma ordem recebida, para que falhas sejam tratadas arquivo a arquivo.
+    """
+    image_files = [image_file for image_file in image_files if image_file]
+    if not image_files:
+        return []
+    if len(image_files) == 1:
+        return [_upload_one(image_files[0])]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(image_files))) as executor:
+        return list(executor.map(_upload_one, image_files))
@@ -1,12 +1,19 @@
 from django.urls import path
 from django.views.generic import RedirectView
 
-from .views import CategoriaCreateView, ProdutoDeleteView, ProdutoListView, ProdutoUpdateView
+from .views import (
+    CategoriaCreateView,
+    ProdutoDeleteView,
+    ProdutoListJSONView,
+    ProdutoListView,
+    ProdutoUpdateView,
+)
 
 app_name = "produtos"
 
 urlpatterns = [
     path("", ProdutoListView.as_view(), name="lista"),
+    path("pagina/", ProdutoListJSONView.as_view(), name="lista_json"),
     path(
         "novo/",
         RedirectView.as_view(pattern_name="produtos:lista", permanent=False),
@@ -1,25 +1,33 @@
 from django.core.cache import cache
 import logging
 
-from django.core.exceptions import ValidationError
+from django.contrib import messages
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views.generic import DeleteView, FormView, ListView, UpdateView
 
+from catalogo.versioning import bump_catalog_version, get_catalog_version
+from catalogo.warmup import enqueue_image_warmup
+from core.pagination import KeysetPaginationMixin
+
 from .forms import CategoriaForm, ProdutoForm, VariacaoFormSet
 from .models import Categoria, Produto, ProdutoImagem, Subcategoria, VariacaoCategoria
-from .services import upload_image_to_imgbb
+from .services import UploadResult, upload_images_to_imgbb
 
 LOGGER = logging.getLogger(__name__)
 
-CATEGORY_CACHE_TIMEOUT = 30
-SUBCATEGORY_CACHE_TIMEOUT = 30
+# As chaves embutem a versão do catálogo (incrementada pelos sinais em
+# catalogo.signals), então o TTL serve apenas para liberar espaço.
+CATEGORY_CACHE_TIMEOUT = 60 * 60 * 6
+SUBCATEGORY_CACHE_TIMEOUT = 60 * 60 * 6
 
 
 def _cached_categories(tenant):
     if not tenant:
         return Categoria.objects.none()
-    cache_key = f"produtos:categorias:{tenant.pk}"
+    cache_key = f"produtos:categorias:{tenant.pk}:{get_catalog_version(tenant)}"
     categorias = cache.get(cache_key)
     if categorias is None:
         categorias = list(Categoria.objects.filter(tenant=tenant))
@@ -30,7 +38,7 @@ def _cached_categories(tenant):
 def _cached_subcategories(tenant):
     if not tenant:
         return Subcategoria.objects.none()
-    cache_key = f"produtos:subcategorias:{tenant.pk}"
+    cache_key = f"produtos:subcategorias:{tenant.pk}:{get_catalog_version(tenant)}"
     subcategorias = cache.get(cache_key)
     if subcategorias is None:
         subcategorias = list(Subcategoria.objects.filter(tenant=tenant))
@@ -38,12 +46,13 @@ def _cached_subcategories(tenant):
     return subcategorias
 
 
-class ProdutoListView(ListView):
+class ProdutoListView(KeysetPaginationMixin, ListView):
     model = Produto
     template_name = "produtos/produto_list.html"
     context_object_name = "produtos"
     paginate_by = 15
-    ordering = ["nome"]
+    ordering = ["nome", "id"]
+    keyset_ordering = ("nome", "id")
 
     def _get_variacao_formset(self, data=None, instance=None):
         return VariacaoFormSet(
@@ -94,23 +103,27 @@ class ProdutoListView(ListView):
         if not variacao_formset.is_valid():
             LOGGER.warning("VariacaoFormSet invalid: %s", variacao_formset.errors)
         if form.is_valid() and variacao_formset.is_valid():
-            if not _handle_image_upload(form):
+            image_ok, extra_results = _handle_image_uploads(form)
+            if not image_ok:
+                # O produto ainda não existe: as fotos extras enviadas voltam no
+                # formulário e são gravadas quando ele for salvo.
+                form.remember_uploaded_images([result.url for result in extra_results if result.ok])
+                for result in extra_results:
+                    if not result.ok:
+                        form.add_error(
+                            "imagens_upload", f"A foto {result.name} não pôde ser enviada: {result.error}"
+                        )
                 if not hasattr(self, "object_list"):
                     self.object_list = self.get_queryset()
                 return self.render_to_response(self.get_context_data(produto_form=form))
             produto = form.save()
             _save_variacoes(variacao_formset, produto)
-            extra_files = form.cleaned_data.get("imagens_upload") or []
-            LOGGER.warning("Received %s extra files for %s (create)", len(extra_files or []), produto)
-            if not _save_extra_images(produto, extra_files):
-                LOGGER.error("Não foi possível salvar imagens extras para %s", produto)
-                form.add_error(
-                    None,
-                    "As imagens extras não puderam ser enviadas. Tente novamente.",
-                )
-                produto.delete()
-            else:
-                return redirect("produtos:lista")
+            LOGGER.warning("Received %s extra files for %s (create)", len(extra_results), produto)
+            failures = _save_extra_images(produto, extra_results)
+            if failures:
+                _report_failed_uploads(request, produto, failures)
+                return redirect("produtos:editar", pk=produto.pk)
+            return redirect("produtos:lista")
         if not hasattr(self, "object_list"):
             self.object_list = self.get_queryset()
         return self.render_to_response(
@@ -118,45 +131,109 @@ class ProdutoListView(ListView):
         )
 
 
-def _handle_image_upload(form):
+class ProdutoListJSONView(ProdutoListView):
+    """Mesma página da listagem em JSON, para rolagem infinita."""
+
+    def post(self, request, *args, **kwargs):
+        return self.http_method_not_allowed(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        # Só a página interessa; categorias e formulários ficam para o HTML.
+        return ListView.get_context_data(self, **kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context["page_obj"]
+        produtos = [
+            {
+                "id": produto.id,
+                "nome": produto.nome,
+                "descricao": produto.descricao,
+                "preco": str(produto.preco),
+                "estoque": produto.estoque,
+                "ativo": produto.ativo,
+                "categoria": produto.categoria.nome if produto.categoria else "",
+                "subcategoria": produto.subcategoria.nome if produto.subcategoria else "",
+                "imagem": produto.get_cached_thumb_url(),
+                "variacoes": len(produto.variacoes.all()),
+            }
+            for produto in page
+        ]
+        return JsonResponse(
+            {"produtos": produtos, "next": page.next_cursor, "previous": page.previous_cursor}
+        )
+
+
+def _handle_image_uploads(form):
+    """
+    Envia a imagem principal e as fotos extras em paralelo.
+
+    Retorna ``(ok, resultados_extras)``: ``ok`` é falso quando a imagem principal
+    falhou (o formulário recebe o erro e o produto não é salvo). Os resultados
+    das fotos extras vêm sempre, inclusive nesse caso, junto com as fotos já
+    enviadas num envio anterior (``imagens_enviadas``), para que quem chama
+    grave as que deram certo e informe só as que falharam.
+    """
     image_file = form.cleaned_data.get("imagem_upload")
+    extra_files = [item for item in form.cleaned_data.get("imagens_upload") or [] if item]
+    previous = [
+        UploadResult(name="", url=url) for url in form.cleaned_data.get("imagens_enviadas") or []
+    ]
     if not image_file:
         LOGGER.warning("No image file attached for %s", form.instance)
-        return True
-
-    try:
-        file_name = getattr(image_file, "name", "unknown")
+    if image_file:
         LOGGER.warning(
             "Uploading image %s (%s bytes) for %s",
-            file_name,
+            getattr(image_file, "name", "unknown"),
             getattr(image_file, "size", "unknown"),
             form.instance,
         )
-        form.instance.imagem = upload_image_to_imgbb(image_file)
-        form.cleaned_data["imagem"] = form.instance.imagem
-        LOGGER.warning("Image upload saved to %s for %s", form.instance.imagem, form.instance)
-        return True
-    except ValidationError as exc:
-        LOGGER.error("Image upload failed: %s", exc)
-        form.add_error("imagem", exc)
-        return False
-
-
-def _save_extra_images(instance, images):
-    if not images:
+    results = upload_images_to_imgbb(([image_file] if image_file else []) + extra_files)
+    if not image_file:
+        return True, previous + results
+
+    main_result, extra_results = results[0], results[1:]
+    if not main_result.ok:
+        LOGGER.error("Image upload failed: %s", main_result.error)
+        form.add_error("imagem_upload", main_result.error)
+        return False, previous + extra_results
+    form.instance.imagem = main_result.url
+    form.cleaned_data["imagem"] = form.instance.imagem
+    LOGGER.warning("Image upload saved to %s for %s", form.instance.imagem, form.instance)
+    enqueue_image_warmup([form.instance.imagem])
+    return True, previous + extra_results
+
+
+def _save_extra_images(instance, results):
+    """
+    Grava de uma vez as fotos extras enviadas com sucesso e devolve os
+    resultados que falharam.
+    """
+    if not results:
         LOGGER.warning("No extra images received for %s", instance)
-        return True
-    for image_file in images:
-        if not image_file:
-            continue
-        try:
-            url = upload_image_to_imgbb(image_file)
-            ProdutoImagem.objects.create(produto=instance, url=url)
-            LOGGER.warning("Extra image uploaded for %s: %s", instance, url)
-        except ValidationError as exc:
-            LOGGER.error("Extra image upload failed for %s: %s", instance, exc)
-            return False
-    return True
+        return []
+    uploaded = [result for result in results if result.ok]
+    failures = [result for result in results if not result.ok]
+    if uploaded:
+        ProdutoImagem.objects.bulk_create(
+            [ProdutoImagem(produto=instance, url=result.url) for result in uploaded]
+        )
+        # bulk_create não dispara post_save.
+        transaction.on_commit(lambda: bump_catalog_version(instance.tenant_id))
+        LOGGER.warning("Extra images uploaded for %s: %s", instance, [r.url for r in uploaded])
+        enqueue_image_warmup([result.url for result in uploaded])
+    for result in failures:
+        LOGGER.error("Extra image upload failed for %s (%s): %s", instance, result.name, result.error)
+    return failures
+
+
+def _report_failed_uploads(request, produto, failures):
+    for result in failures:
+        saved = f"O produto {produto} foi salvo; envie" if produto else "Envie"
+        messages.warning(
+            request,
+            f"A foto {result.name} não pôde ser enviada: {result.error} "
+            f"{saved} essa foto novamente.",
+        )
 
 
 def _save_variacoes(formset, produto):
@@ -251,20 +328,21 @@ class ProdutoUpdateView(UpdateView):
         return self.form_invalid(form)
 
     def form_valid(self, form):
-        if not _handle_image_upload(form):
+        image_ok, extra_results = _handle_image_uploads(form)
+        if not image_ok:
+            # As fotos extras não dependem da principal: grava as que subiram.
+            with transaction.atomic():
+                failures = _save_extra_images(self.object, extra_results)
+            _report_failed_uploads(self.request, None, failures)
             return self.form_invalid(form)
         produto = form.save()
         _save_variacoes(self.variacao_formset, produto)
-        extra_files = form.cleaned_data.get("imagens_upload") or []
-        LOGGER.warning("Received %s extra files for %s (update)", len(extra_files or []), produto)
-        if not _save_extra_images(produto, extra_files):
-            LOGGER.error("Não foi possível salvar imagens extras para %s", produto)
-            form.add_error(
-                None,
-                "As imagens extras não puderam ser enviadas. Tente novamente.",
-            )
-            return self.form_invalid(form)
+        LOGGER.warning("Received %s extra files for %s (update)", len(extra_results), produto)
+        failures = _save_extra_images(produto, extra_results)
         self.object = produto
+        if failures:
+            _report_failed_uploads(self.request, produto, failures)
+            return redirect("produtos:editar", pk=produto.pk)
         return redirect(self.get_success_url())
 
 
@@ -280,6 +358,7 @@ class ProdutoDeleteView(DeleteView):
             return qs.filter(tenant=tenant)
         return qs.none()
 
+
 class CategoriaCreateView(FormView):
     template_name = "produtos/categoria_form.html"
     form_class = CategoriaForm
@@ -5,3 +5,8 @@ class TenantsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tenants"
     verbose_name = "Papelarias (Tenants)"
+
+    def ready(self):
+        from tenants.signals import connect_signals
+
+        connect_signals()
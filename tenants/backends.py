@@ -1,17 +1,80 @@
+import hashlib
+
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.functions import Lower
+
+# E-mail (normalizado) -> id do usuário. Só acertos são guardados; o id é
+# sempre conferido contra o e-mail atual do usuário.
+EMAIL_KEY = "tenants:email:{digest}"
+EMAIL_TIMEOUT = 60 * 60 * 24
+
+# Depois de LOGIN_MAX_FAILURES senhas erradas para o mesmo e-mail vindas do
+# mesmo IP, novas tentativas desse IP são recusadas sem rodar o hasher até a
+# janela expirar. A conta continua acessível de outros endereços, então quem
+# só conhece o e-mail não consegue bloquear o dono.
+FAILURES_KEY = "tenants:login:falhas:{digest}"
+LOGIN_MAX_FAILURES = 5
+LOGIN_FAILURE_WINDOW = 60 * 5
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _client_ip(request):
+    if request is None:
+        return ""
+    # O último endereço do X-Forwarded-For é o que o proxy da hospedagem
+    # acrescentou; os anteriores vêm do cliente e podem ser forjados.
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if forwarded:
+        return forwarded.split(",")[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
 
 
 class EmailBackend(ModelBackend):
-    def authenticate(self, request, username=None, password=None, **kwargs):
+    def _lookup_user(self, email):
         UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(email=username)
-        except UserModel.DoesNotExist:
+        key = EMAIL_KEY.format(digest=_digest(email))
+        user_id = cache.get(key)
+        if user_id is not None:
+            user = UserModel._default_manager.filter(pk=user_id).first()
+            if user is not None and (user.email or "").lower() == email:
+                return user
+            cache.delete(key)
+        # Usa o índice auth_user_email_lower; e-mails duplicados não autenticam.
+        users = list(
+            UserModel._default_manager.alias(email_lower=Lower("email")).filter(email_lower=email)[:2]
+        )
+        if len(users) != 1:
+            return None
+        cache.set(key, users[0].pk, EMAIL_TIMEOUT)
+        return users[0]
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if not username or password is None:
+            return None
+        email = username.strip().lower()
+        failures_key = FAILURES_KEY.format(digest=_digest(f"{email}|{_client_ip(request)}"))
+        if (cache.get(failures_key) or 0) >= LOGIN_MAX_FAILURES:
             return None
 
-        if user.check_password(password) and self.user_can_authenticate(user):
+        user = self._lookup_user(email)
+        if user is None:
+            # Roda o hasher mesmo assim para que e-mails inexistentes levem o
+            # mesmo tempo que uma senha errada.
+            get_user_model()().set_password(password)
+        elif user.check_password(password) and self.user_can_authenticate(user):
+            cache.delete(failures_key)
             return user
+
+        cache.add(failures_key, 0, LOGIN_FAILURE_WINDOW)
+        try:
+            cache.incr(failures_key)
+        except ValueError:
+            pass
         return None
 
     def get_user(self, user_id):
@@ -0,0 +1,35 @@
+"""
+Tenant guardado no cache compartilhado para o ``TenantMiddleware``.
+
+O middleware usa o ``tenant_id`` gravado na sessão no login para obter o
+tenant sem consultar o banco. Só os campos do ``TenantProfile`` (com o
+``user_id``) vão para o cache: o usuário continua vindo da autenticação padrão
+do Django, que confere o hash da sessão, e a senha nunca é gravada no cache. A
+entrada é removida (após o commit) sempre que o tenant é gravado ou excluído.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from tenants.models import TenantProfile
+
+TENANT_KEY = "tenants:perfil:{tenant_id}"
+TENANT_TIMEOUT = 60 * 15
+
+
+def get_cached_tenant(tenant_id):
+    key = TENANT_KEY.format(tenant_id=tenant_id)
+    tenant = cache.get(key)
+    if tenant is None:
+        tenant = TenantProfile.objects.filter(pk=tenant_id).first()
+        if tenant is None:
+            return None
+        cache.set(key, tenant, TENANT_TIMEOUT)
+    return tenant
+
+
+def invalidate_cached_tenant(tenant_id):
+    key = TENANT_KEY.format(tenant_id=tenant_id)
+    cache.delete(key)
+    # De novo após o commit, caso outra requisição tenha relido o valor antigo.
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Índice funcional usado pelo ``EmailBackend`` (``LOWER(email) = %s``)."""
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS auth_user_email_lower ON auth_user (LOWER(email));",
+            reverse_sql="DROP INDEX IF EXISTS auth_user_email_lower;",
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+
+from tenants.cache import invalidate_cached_tenant
+from tenants.models import TenantProfile
+
+
+def _tenant_changed(sender, instance, **kwargs):
+    if not kwargs.get("raw"):
+        invalidate_cached_tenant(instance.pk)
+
+
+def connect_signals():
+    for signal, name in ((post_save, "save"), (post_delete, "delete")):
+        signal.connect(_tenant_changed, sender=TenantProfile, dispatch_uid=f"tenants-cache-tenant-{name}")